@@ -2,18 +2,34 @@
 Parse Document AI batch output JSON and convert to Excel.
 
 Uses VoterID positions as anchors to group entities into cards.
+
+Usage:
+    # Pick a JSON file with a dialog
+    python docai_json_to_excel.py
+
+    # Convert files or whole folders directly (no Tk, one process per core)
+    python docai_json_to_excel.py output-1.json output-2.json --out-dir excel/
+    python docai_json_to_excel.py batch_output/ --workers 8
 """
 
-import json
+import argparse
+import io
+import mmap
+import os
 import re
+import sys
+import zipfile
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from xml.sax.saxutils import escape
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import subprocess
 
 # Install packages
 def install_packages():
-    packages = ['openpyxl']
+    packages = ['orjson']
     for pkg in packages:
         try:
             __import__(pkg)
@@ -23,8 +39,80 @@ def install_packages():
 
 install_packages()
 
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
+import orjson
+
+
+# Static xlsx parts. Only sheet1.xml depends on the data, so the workbook is
+# assembled directly instead of building an openpyxl cell graph.
+_CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Voter Data" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# cellXfs: 0 = default, 1 = bold centered header, 2 = yellow fill (missing value)
+_STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2">'
+    '<font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '</fonts>'
+    '<fills count="3">'
+    '<fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="00FFFF00"/><bgColor rgb="00FFFF00"/></patternFill></fill>'
+    '</fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1" applyAlignment="1">'
+    '<alignment horizontal="center"/></xf>'
+    '<xf numFmtId="0" fontId="0" fillId="2" borderId="0" xfId="0" applyFill="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_HEADER_STYLE = 1
+_MISSING_STYLE = 2
+
+_COLUMNS = 'ABCDEFGHIJ'
+
+_HEADERS = ['S.No', 'Part No.', 'Voter S.No', 'Voter ID', 'Name',
+            'Relation Name', 'House No', 'Age', 'Gender', 'Page']
+
+# Column widths
+_WIDTHS = [8, 10, 10, 15, 25, 25, 12, 8, 10, 8]
 
 
 def extract_part_number(filename):
@@ -52,6 +140,18 @@ def get_entity_position(entity):
     return page, x, y
 
 
+_TYPE_CACHE = {}
+
+
+def get_entity_type(entity):
+    """Get lowercased entity type, interned so repeated types share one string."""
+    raw = entity.get('type', '')
+    entity_type = _TYPE_CACHE.get(raw)
+    if entity_type is None:
+        entity_type = _TYPE_CACHE[raw] = sys.intern(raw.lower())
+    return entity_type
+
+
 def group_entities_to_cards(entities):
     """
     Group flat entities into voter cards.
@@ -72,14 +172,18 @@ def group_entities_to_cards(entities):
             entity['_col'] = 2
 
     # Find all voterID positions - these anchor each card
-    voter_ids = [e for e in entities if e.get('type', '').lower() == 'voterid']
+    voter_ids = [e for e in entities if get_entity_type(e) == 'voterid']
 
     # Create card slots based on voterID positions
     cards = []
     for vid in voter_ids:
+        # Voter IDs are normally already uppercase; skip the extra copy then
+        voter_id = vid.get('mentionText', '').strip()
+        if not voter_id.isupper():
+            voter_id = voter_id.upper()
         card = {
             'serial_no': '',
-            'voter_id': vid.get('mentionText', '').strip().upper(),
+            'voter_id': voter_id,
             'name': '',
             'relation_name': '',
             'house_no': '',
@@ -95,22 +199,28 @@ def group_entities_to_cards(entities):
     # Sort cards by page, col, y
     cards.sort(key=lambda c: (c['page'], c['col'], c['_y_start']))
 
-    # Update y_end for each card (ends where next card in same page/col starts)
-    for i, card in enumerate(cards):
-        for j in range(i + 1, len(cards)):
-            if cards[j]['page'] == card['page'] and cards[j]['col'] == card['col']:
-                card['_y_end'] = cards[j]['_y_start']
-                break
+    # Update y_end for each card (ends where next card in same page/col starts).
+    # Cards are sorted by (page, col, y), so the next card in the same
+    # page/col is always the adjacent one.
+    for card, next_card in zip(cards, cards[1:]):
+        if next_card['page'] == card['page'] and next_card['col'] == card['col']:
+            card['_y_end'] = next_card['_y_start']
+
+    # Index cards per (page, col); each group is already sorted by y_start
+    card_groups = {}
+    for card in cards:
+        card_groups.setdefault((card['page'], card['col']), []).append(card)
+    group_starts = {key: [c['_y_start'] for c in group] for key, group in card_groups.items()}
 
     # Assign all other entities to their respective cards
     for entity in entities:
-        if entity.get('type', '').lower() == 'voterid':
+        entity_type = get_entity_type(entity)
+        if entity_type == 'voterid':
             continue  # Already processed
 
         page = entity['_page']
         col = entity['_col']
         y = entity['_y']
-        entity_type = entity.get('type', '').lower()
         mention_text = entity.get('mentionText', '').strip()
 
         # Clean mention text
@@ -119,19 +229,20 @@ def group_entities_to_cards(entities):
 
         # Find the card this entity belongs to
         best_card = None
-        for card in cards:
-            if card['page'] == page and card['col'] == col:
-                if card['_y_start'] <= y < card['_y_end']:
-                    best_card = card
-                    break
-                elif abs(y - card['_y_start']) < 0.12:
-                    best_card = card
-
-        if not best_card:
-            # Fallback: find closest card in same page/col
-            candidates = [c for c in cards if c['page'] == page and c['col'] == col]
-            if candidates:
-                best_card = min(candidates, key=lambda c: abs(c['_y_start'] - y))
+        group = card_groups.get((page, col))
+        if group:
+            starts = group_starts[(page, col)]
+            i = bisect_right(starts, y) - 1
+            if i >= 0 and y < group[i]['_y_end']:
+                best_card = group[i]
+            else:
+                # Last card starting within 0.12 of the entity
+                j = bisect_left(starts, y + 0.12) - 1
+                if j >= 0 and abs(y - starts[j]) < 0.12:
+                    best_card = group[j]
+                else:
+                    # Fallback: find closest card in same page/col
+                    best_card = min(group, key=lambda c: abs(c['_y_start'] - y))
 
         if best_card:
             if entity_type == 'sno':
@@ -157,77 +268,90 @@ def group_entities_to_cards(entities):
     return cards
 
 
-def save_to_excel(cards, output_path, source_name):
-    """Save cards to Excel file."""
-    part_no = extract_part_number(source_name)
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Voter Data"
-
-    headers = ['S.No', 'Part No.', 'Voter S.No', 'Voter ID', 'Name',
-               'Relation Name', 'House No', 'Age', 'Gender', 'Page']
-
-    yellow_fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
+# Control characters XML 1.0 can't hold; Excel reports the workbook as corrupt if any
+# reach the sheet. Same set openpyxl strips (openpyxl.cell.cell.ILLEGAL_CHARACTERS_RE).
+_ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
 
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
 
-    missing_stats = {'name': 0, 'age': 0, 'gender': 0, 'voter_id': 0}
+def _xlsx_cell(ref, value, style=0):
+    """Render a single <c> element (inline string or number)."""
+    s_attr = f' s="{style}"' if style else ''
+    if value is None or value == '':
+        return f'<c r="{ref}"{s_attr}/>' if style else ''
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"{s_attr}><v>{value}</v></c>'
+    text = escape(_ILLEGAL_CHARACTERS_RE.sub('', str(value)))
+    return f'<c r="{ref}"{s_attr} t="inlineStr"><is><t>{text}</t></is></c>'
 
-    for row_num, card in enumerate(cards, 2):
-        ws.cell(row=row_num, column=1, value=row_num - 1)
-        ws.cell(row=row_num, column=2, value=part_no)
-        ws.cell(row=row_num, column=3, value=card.get('serial_no', ''))
 
-        vid = card.get('voter_id', '')
-        vc = ws.cell(row=row_num, column=4, value=vid)
-        if not vid:
-            vc.fill = yellow_fill
-            missing_stats['voter_id'] += 1
+# Everything in sheet1.xml up to the first data row is fixed, so the column
+# widths and the styled header row are rendered once at import.
+_SHEET_HEAD_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><cols>'
+    + ''.join(f'<col min="{col}" max="{col}" width="{width}" customWidth="1"/>'
+              for col, width in enumerate(_WIDTHS, 1))
+    + '</cols><sheetData><row r="1">'
+    + ''.join(_xlsx_cell(f'{letter}1', header, _HEADER_STYLE)
+              for letter, header in zip(_COLUMNS, _HEADERS))
+    + '</row>'
+)
 
-        name = card.get('name', '')
-        nc = ws.cell(row=row_num, column=5, value=name)
-        if not name:
-            nc.fill = yellow_fill
-            missing_stats['name'] += 1
 
-        ws.cell(row=row_num, column=6, value=card.get('relation_name', ''))
-        ws.cell(row=row_num, column=7, value=card.get('house_no', ''))
-
-        age = card.get('age', '')
-        ac = ws.cell(row=row_num, column=8, value=age)
-        if not age:
-            ac.fill = yellow_fill
-            missing_stats['age'] += 1
-
-        gender = card.get('gender', '')
-        gc = ws.cell(row=row_num, column=9, value=gender)
-        if not gender:
-            gc.fill = yellow_fill
-            missing_stats['gender'] += 1
-
-        ws.cell(row=row_num, column=10, value=card.get('page', ''))
+def save_to_excel(cards, output_path, source_name):
+    """Save cards to Excel file."""
+    part_no = extract_part_number(source_name)
 
-    # Column widths
-    widths = [8, 10, 10, 15, 25, 25, 12, 8, 10, 8]
-    for col, width in enumerate(widths, 1):
-        ws.column_dimensions[chr(64 + col)].width = width
+    # Tally missing fields up front so the row writer below only emits XML
+    missing_stats = {field: sum(1 for card in cards if not card.get(field, ''))
+                     for field in ('name', 'age', 'gender', 'voter_id')}
+
+    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES_XML)
+        zf.writestr('_rels/.rels', _ROOT_RELS_XML)
+        zf.writestr('xl/workbook.xml', _WORKBOOK_XML)
+        zf.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS_XML)
+        zf.writestr('xl/styles.xml', _STYLES_XML)
+
+        with io.TextIOWrapper(zf.open('xl/worksheets/sheet1.xml', 'w'), encoding='utf-8') as f:
+            f.write(_SHEET_HEAD_XML)
+
+            for row_num, card in enumerate(cards, 2):
+                vid = card.get('voter_id', '')
+                name = card.get('name', '')
+                age = card.get('age', '')
+                gender = card.get('gender', '')
+
+                f.write(
+                    f'<row r="{row_num}">'
+                    f'{_xlsx_cell(f"A{row_num}", row_num - 1)}'
+                    f'{_xlsx_cell(f"B{row_num}", part_no)}'
+                    f'{_xlsx_cell(f"C{row_num}", card.get("serial_no", ""))}'
+                    f'{_xlsx_cell(f"D{row_num}", vid, 0 if vid else _MISSING_STYLE)}'
+                    f'{_xlsx_cell(f"E{row_num}", name, 0 if name else _MISSING_STYLE)}'
+                    f'{_xlsx_cell(f"F{row_num}", card.get("relation_name", ""))}'
+                    f'{_xlsx_cell(f"G{row_num}", card.get("house_no", ""))}'
+                    f'{_xlsx_cell(f"H{row_num}", age, 0 if age else _MISSING_STYLE)}'
+                    f'{_xlsx_cell(f"I{row_num}", gender, 0 if gender else _MISSING_STYLE)}'
+                    f'{_xlsx_cell(f"J{row_num}", card.get("page", ""))}'
+                    '</row>'
+                )
+
+            f.write('</sheetData></worksheet>')
 
-    wb.save(output_path)
     return missing_stats
 
 
-def process_json_file(json_path):
-    """Process a single JSON file."""
+def process_json_file(json_path, out_dir=None):
+    """Process a single JSON file. Excel is written next to it unless out_dir is given."""
     print(f"\nProcessing: {json_path.name}")
 
     # Load JSON
     print("Loading JSON...")
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # Map the file instead of reading it into a bytes copy first
+    with open(json_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data = orjson.loads(memoryview(mm))
 
     entities = data.get('entities', [])
     print(f"Found {len(entities)} entities")
@@ -252,13 +376,111 @@ def process_json_file(json_path):
     print(f"Created {len(cards)} voter cards")
 
     # Save to Excel
-    output_path = json_path.parent / f"{json_path.stem}_excel.xlsx"
+    output_dir = Path(out_dir) if out_dir else json_path.parent
+    output_path = output_dir / f"{json_path.stem}_excel.xlsx"
     missing_stats = save_to_excel(cards, output_path, json_path.stem)
 
     return cards, missing_stats, output_path
 
 
+def print_summary(total, missing_stats, output_path):
+    """Print the per-file summary to stdout."""
+    print(f"\n{'='*50}")
+    print(f"SUMMARY")
+    print(f"{'='*50}")
+    print(f"Total cards: {total}")
+    print(f"Missing Voter ID: {missing_stats['voter_id']}")
+    print(f"Missing Name: {missing_stats['name']}")
+    print(f"Missing Age: {missing_stats['age']}")
+    print(f"Missing Gender: {missing_stats['gender']}")
+    print(f"\nExcel saved to: {output_path}")
+
+
+def convert_json_file(json_path, out_dir=None):
+    """
+    Worker entry point for batch runs.
+    Returns (json_path, total_cards, missing_stats, output_path), or None if
+    the file had no entities. The card list itself is not sent back.
+    """
+    result = process_json_file(json_path, out_dir)
+    if result[0] is None:
+        return None
+    cards, missing_stats, output_path = result
+    return json_path, len(cards), missing_stats, output_path
+
+
+def collect_json_files(inputs):
+    """Expand directories to the *.json files they contain."""
+    paths = []
+    for p in inputs:
+        path = Path(p)
+        if path.is_dir():
+            paths.extend(sorted(path.glob('*.json')))
+        else:
+            paths.append(path)
+    return paths
+
+
+def run_cli(inputs, out_dir=None, workers=None):
+    """Process JSON files given on the command line, without any Tk dialogs."""
+    if out_dir:
+        Path(out_dir).mkdir(parents=True, exist_ok=True)
+
+    paths = collect_json_files(inputs)
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+
+    # Files are independent, so spread them across processes. Each file's
+    # outcome is kept on its own: one bad JSON doesn't stop the rest.
+    outcomes = {}
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(convert_json_file, path, out_dir): path for path in paths}
+            for future in as_completed(futures):
+                try:
+                    outcomes[futures[future]] = future.result()
+                except Exception as e:
+                    outcomes[futures[future]] = e
+    else:
+        for path in paths:
+            try:
+                outcomes[path] = convert_json_file(path, out_dir)
+            except Exception as e:
+                outcomes[path] = e
+
+    failed = []
+    for path in paths:
+        result = outcomes[path]
+        if result is None or isinstance(result, Exception):
+            reason = 'no entities found' if result is None else f'{type(result).__name__}: {result}'
+            print(f"Error: {path}: {reason}")
+            failed.append((path, reason))
+            continue
+        json_path, total, missing_stats, output_path = result
+        print(f"\n{json_path.name}")
+        print_summary(total, missing_stats, output_path)
+
+    if failed:
+        print(f"\n{len(paths) - len(failed)} of {len(paths)} files converted. Failed:")
+        for path, reason in failed:
+            print(f"  {path}: {reason}")
+
+    return 1 if failed else 0
+
+
 def main():
+    parser = argparse.ArgumentParser(
+        description='Convert Document AI batch output JSON to Excel. '
+                    'Opens a file dialog when no inputs are given.'
+    )
+    parser.add_argument('inputs', nargs='*', help='Document AI JSON files or folders of them')
+    parser.add_argument('--out-dir', help='Directory for Excel output (default: next to each JSON)')
+    parser.add_argument('--workers', '-w', type=int, default=os.cpu_count(),
+                        help=f'Parallel worker processes (default: {os.cpu_count()})')
+    args = parser.parse_args()
+
+    if args.inputs:
+        return run_cli(args.inputs, args.out_dir, args.workers)
+
     # Select JSON file
     root = tk.Tk()
     root.withdraw()
@@ -273,24 +495,14 @@ def main():
         return
 
     json_path = Path(json_file)
-    result = process_json_file(json_path)
+    result = process_json_file(json_path, args.out_dir)
 
     if result[0] is None:
         messagebox.showerror("Error", "No entities found in the JSON file")
         return
 
     cards, missing_stats, output_path = result
-
-    # Summary
-    print(f"\n{'='*50}")
-    print(f"SUMMARY")
-    print(f"{'='*50}")
-    print(f"Total cards: {len(cards)}")
-    print(f"Missing Voter ID: {missing_stats['voter_id']}")
-    print(f"Missing Name: {missing_stats['name']}")
-    print(f"Missing Age: {missing_stats['age']}")
-    print(f"Missing Gender: {missing_stats['gender']}")
-    print(f"\nExcel saved to: {output_path}")
+    print_summary(len(cards), missing_stats, output_path)
 
     # Calculate accuracy
     total = len(cards)
@@ -317,4 +529,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -19,12 +19,25 @@ Features:
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
 import subprocess
+import tempfile
+import hashlib
+import sqlite3
+import os
 import re
+import zipfile
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+# Tesseract's own OpenMP threads slow it down; parallelism comes from running several
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
 
 # Install dependencies
 def install_packages():
-    packages = ['openpyxl', 'pillow', 'pytesseract']
+    packages = ['openpyxl', 'pillow', 'pytesseract', 'numpy', 'xlsxwriter']
     for pkg in packages:
         try:
             __import__(pkg.replace('-', '_'))
@@ -35,8 +48,9 @@ def install_packages():
 install_packages()
 
 from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
+import xlsxwriter
 from PIL import Image, ImageTk, ImageEnhance
+import numpy as np
 
 try:
     import pytesseract
@@ -44,7 +58,479 @@ except ImportError:
     subprocess.check_call(['uv', 'pip', 'install', 'pytesseract'])
     import pytesseract
 
-TESSERACT_CONFIG = '--psm 6 --oem 1'
+# LSTM engine, one uniform text block; cards are never white-on-black, so skip the invert pass
+TESSERACT_CONFIG = '--psm 6 --oem 1 -c tessedit_do_invert=0'
+# Labelled age, range-checked in the pattern itself: 18-120
+AGE_RE = re.compile(r'வயது\s*:\s*(1[89]|[2-9]\d|1[01]\d|120)(?!\d)')
+
+# Gender keywords in one alternation; the matching group names the gender
+GENDER_RE = re.compile(r'(?P<F>பெண்)|(?P<T>திருநங்கை|மூன்றாம்|Third)|(?P<M>ஆண்)')
+GENDERS = {'F': 'Female', 'T': 'Third Gender', 'M': 'Male'}
+
+# OCR Retry only reads Age/Gender, so limit Tesseract to the glyphs of those labels,
+# values and digits (a smaller search for the LSTM decoder on the large Tamil set).
+# Search Image needs names and Voter IDs, so it keeps the full character set.
+AGE_GENDER_WORDS = ('வயது', 'பாலினம்', 'ஆண்', 'பெண்', 'திருநங்கை', 'மூன்றாம்',
+                    'Age', 'Gender', 'Male', 'Female', 'Third')
+AGE_GENDER_CHARS = ''.join(sorted(set('0123456789:' + ''.join(AGE_GENDER_WORDS))))
+AGE_GENDER_CONFIG = f'{TESSERACT_CONFIG} -c tessedit_char_whitelist={AGE_GENDER_CHARS}'
+OCR_BATCH_SIZE = 50  # Images per Tesseract process when searching
+OCR_WORKERS = os.cpu_count() or 1  # Tesseract processes run in parallel
+SEARCH_OCR_MAX_SIDE = 900  # Search only needs the Voter ID, so OCR cards at most this big
+PREFETCH_BATCH_SIZE = 160  # Images per Tesseract process when prefetching after load
+OCR_MAX_SIDE = 1800  # OCR Retry scales larger cards down to this
+
+# Formatting of the v4.0 export, re-created when the sheet is rewritten
+HEADER_FORMAT = {'bold': True, 'align': 'center'}
+MISSING_FORMAT = {'bg_color': '#FFFF00', 'pattern': 1}
+COLUMN_WIDTHS = [8, 10, 15, 25, 12, 25, 15, 8, 10, 30, 50, 10]
+
+OCR_DB_PATH = Path.home() / '.voters_project' / 'ocr.sqlite'  # OCR results kept across sessions
+
+# OCR Retry cards, one per thread; tesseract runs as a subprocess, so threads are enough to parallelize
+OCR_POOL = ThreadPoolExecutor(max_workers=OCR_WORKERS)
+
+
+def shrink_for_ocr(image_paths, max_side, out_dir):
+    """Write grayscale copies of images larger than max_side into out_dir.
+
+    Returns the paths to OCR, in order; small images are passed through as is.
+    """
+    paths = []
+    for i, path in enumerate(image_paths):
+        try:
+            img = Image.open(path)
+            if max(img.size) <= max_side:
+                paths.append(path)
+                continue
+            img.draft('L', (max_side, max_side))
+            img = img.convert('L')
+            img.thumbnail((max_side, max_side), Image.LANCZOS)
+            small_path = Path(out_dir) / f"{i}.png"
+            img.save(small_path, compress_level=1)
+            paths.append(small_path)
+        except Exception:
+            paths.append(path)  # Let Tesseract report it
+    return paths
+
+
+def run_tesseract_list(image_paths, lang, config, *outputs):
+    """Run one Tesseract process over a list file of images and return its stdout.
+
+    Returns '' if Tesseract couldn't be started or failed on any image, so the
+    callers fall back to OCR-ing the images one by one.
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as list_file:
+        list_file.write('\n'.join(str(p) for p in image_paths) + '\n')
+        list_path = list_file.name
+
+    try:
+        # One OpenMP thread per Tesseract; parallelism comes from running several
+        result = subprocess.run(
+            [pytesseract.pytesseract.tesseract_cmd, list_path, 'stdout', '-l', lang, *config.split(), *outputs],
+            capture_output=True, env={**os.environ, 'OMP_THREAD_LIMIT': '1'}
+        )
+    except OSError:
+        return ''
+    finally:
+        os.unlink(list_path)
+
+    if result.returncode != 0:
+        return ''
+    return result.stdout.decode('utf-8', errors='replace')
+
+
+def collect_words(words):
+    """Build (text, [(word, confidence)]) for one image from Tesseract word rows.
+
+    words are (line key, word, confidence) tuples in reading order.
+    """
+    lines = {}
+    tokens = []
+    for line_key, word, conf in words:
+        if not word.strip():
+            continue
+        lines.setdefault(line_key, []).append(word)
+        tokens.append((word, conf))
+    return '\n'.join(' '.join(line) for line in lines.values()), tokens
+
+
+def confident_tokens(words, min_conf=60):
+    """Join the words read with confidence over min_conf, normalized for Voter ID matching."""
+    return ' '.join(word.strip(' .,:;|').upper() for word, conf in words if conf > min_conf)
+
+
+def ocr_images_words(image_paths, lang='tam+eng', config=TESSERACT_CONFIG, max_side=None):
+    """OCR several images with one Tesseract process so the models load once.
+
+    Tesseract treats a .txt input as a list of image paths; each image is one
+    page_num of its TSV output. Returns (text, [(word, confidence)]) per image,
+    in order. With max_side, larger images are downscaled first (OCR cost grows
+    with pixels).
+    """
+    if not image_paths:
+        return []
+
+    if max_side:
+        with tempfile.TemporaryDirectory() as small_dir:
+            return ocr_images_words(shrink_for_ocr(image_paths, max_side, small_dir), lang, config)
+
+    pages = {}
+    for line in run_tesseract_list(image_paths, lang, config, 'tsv').splitlines():
+        cols = line.split('\t')
+        if len(cols) < 12 or not cols[0].isdigit():
+            continue  # Header or malformed line
+        words = pages.setdefault(cols[1], [])
+        if cols[0] == '5':  # Word level
+            words.append(((cols[2], cols[3], cols[4]), cols[11], float(cols[10])))
+
+    if len(pages) >= len(image_paths):
+        return [collect_words(words) for words in list(pages.values())[:len(image_paths)]]
+
+    # Tesseract failed or skipped an unreadable image, so pages can't be matched up; go one by one
+    results = []
+    for path in image_paths:
+        try:
+            data = pytesseract.image_to_data(Image.open(path), lang=lang, config=config,
+                                             output_type=pytesseract.Output.DICT)
+        except Exception:
+            results.append(('', []))
+            continue
+        results.append(collect_words(
+            ((data['block_num'][i], data['par_num'][i], data['line_num'][i]), data['text'][i], float(data['conf'][i]))
+            for i in range(len(data['text'])) if data['level'][i] == 5
+        ))
+    return results
+
+
+# Rows and cells in worksheet XML, matched without parsing the whole sheet
+XLSX_ROW_RE = re.compile(rb'<row\b[^>]*?\br="(\d+)"[^>]*?(?:/>|>(.*?)</row>)', re.S)
+XLSX_CELL_RE = re.compile(rb'<c\b[^>]*?\br="([A-Z]+)\d+"[^>]*?(?:/>|>.*?</c>)', re.S)
+XLSX_STYLE_RE = re.compile(rb'\ss="\d+"')
+XLSX_NS = {
+    'm': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+}
+
+
+def column_number(letters):
+    """Convert column letters as bytes (b'A', b'H', b'AB') to the 1-based number."""
+    number = 0
+    for ch in letters:
+        number = number * 26 + ch - 64
+    return number
+
+
+def active_sheet_part(archive):
+    """Return the zip member name of the workbook's active sheet."""
+    workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    view = workbook.find('m:bookViews/m:workbookView', XLSX_NS)
+    active = int(view.get('activeTab', 0)) if view is not None else 0
+    sheet = workbook.findall('m:sheets/m:sheet', XLSX_NS)[active]
+    rel_id = sheet.get(f"{{{XLSX_NS['r']}}}id")
+
+    rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    target = next(rel.get('Target') for rel in rels if rel.get('Id') == rel_id)
+    return target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+
+
+def xlsx_cell_xml(ref, value, style=b''):
+    """Render one worksheet cell; text is written as an inline string."""
+    if value is None:
+        return b'<c r="%s"%s/>' % (ref, style)
+    return b'<c r="%s" t="inlineStr"><is><t>%s</t></is></c>' % (ref, escape(str(value)).encode('utf-8'))
+
+
+def patch_xlsx_cells(xlsx_path, cells):
+    """Rewrite cells of the active sheet by patching its XML inside the xlsx zip.
+
+    cells maps (row, column letter) -> value. A value replaces the cell and drops
+    its style (clearing the missing-data fill); None empties the cell but keeps
+    its style. Returns False, leaving the file untouched, if a row isn't in the
+    sheet XML so the caller can fall back to openpyxl.
+    """
+    if not cells:
+        return True
+
+    edits = {}
+    for (row, column), value in cells.items():
+        edits.setdefault(row, {})[column.encode('ascii')] = value
+
+    xlsx_path = Path(xlsx_path)
+    with zipfile.ZipFile(xlsx_path) as archive:
+        sheet_part = active_sheet_part(archive)
+        sheet_xml = archive.read(sheet_part)
+
+        pieces = []
+        last = 0
+        for row_match in XLSX_ROW_RE.finditer(sheet_xml):
+            row_cells = edits.get(int(row_match.group(1)))
+            if row_cells is None:
+                continue
+            if row_match.group(2) is None:
+                return False  # Empty <row/>; leave it to openpyxl
+
+            # Existing cells in column order, with the edited ones swapped in
+            by_column = {}
+            for cell_match in XLSX_CELL_RE.finditer(row_match.group(2)):
+                by_column[cell_match.group(1)] = cell_match.group(0)
+            for column, value in row_cells.items():
+                old = by_column.get(column, b'')
+                style = b''
+                if value is None:
+                    style_match = XLSX_STYLE_RE.search(old)
+                    style = style_match.group(0) if style_match else b''
+                by_column[column] = xlsx_cell_xml(column + row_match.group(1), value, style)
+
+            pieces.append(sheet_xml[last:row_match.start(2)])
+            pieces.extend(by_column[c] for c in sorted(by_column, key=column_number))
+            last = row_match.end(2)
+            del edits[int(row_match.group(1))]
+
+        if edits:
+            return False
+        pieces.append(sheet_xml[last:])
+
+        # Write beside the original and swap in, so a failed save can't corrupt it
+        with tempfile.NamedTemporaryFile(dir=xlsx_path.parent, suffix='.xlsx', delete=False) as tmp:
+            tmp_path = tmp.name
+        try:
+            with zipfile.ZipFile(tmp_path, 'w') as out:
+                for info in archive.infolist():
+                    data = b''.join(pieces) if info.filename == sheet_part else archive.read(info)
+                    out.writestr(info, data)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    os.replace(tmp_path, xlsx_path)
+    return True
+
+
+def decode_for_display(image_path, max_width=700, max_height=500):
+    """Decode an image for the preview label (safe to call off the Tk thread).
+
+    Returns (display_image, full_image). Large JPEGs are decoded at a reduced
+    scale, in which case full_image is None and OCR reopens the file.
+    """
+    img = Image.open(image_path)
+    full_size = img.size
+
+    # Let libjpeg downscale while decoding (no-op for PNG)
+    img.draft('RGB', (max_width, max_height))
+    img.load()
+
+    # Calculate resize to fit in label
+    ratio = min(max_width / img.width, max_height / img.height)
+    new_size = (int(img.width * ratio), int(img.height * ratio))
+    display = img.resize(new_size, Image.LANCZOS)
+
+    return display, (img if img.size == full_size else None)
+
+
+def match_gender(text):
+    """Return the gender named in OCR text, or '' if there is none."""
+    if 'பாலினம்' not in text:
+        return ''
+    gender_match = GENDER_RE.search(text)
+    return GENDERS[gender_match.lastgroup] if gender_match else ''
+
+
+def is_missing(value):
+    """Check a cell value for Age/Gender: empty or whitespace-only counts as missing."""
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+IS_MISSING = np.frompyfunc(is_missing, 1, 1)  # Elementwise over object arrays
+
+
+def extract_age(text):
+    """Return the first labelled age in OCR text that is a plausible voter age, or ''."""
+    age_match = AGE_RE.search(text)
+    return age_match.group(1) if age_match else ''
+
+
+def parse_age_gender(text):
+    """Extract (age, gender) from one OCR text, '' for a field that isn't there."""
+    return extract_age(text), match_gender(text)
+
+
+def binarize(img, threshold=140):
+    """Threshold to a 1-bit image in one vectorized NumPy pass over the pixels."""
+    gray = np.asarray(img.convert('L'))
+    return Image.fromarray(gray >= threshold)
+
+
+# Preprocessing approaches, most likely to read cleanly first
+OCR_APPROACHES = [
+    ('binarize', binarize),
+    ('grayscale', lambda i: i.convert('L')),
+    ('contrast', lambda i: ImageEnhance.Contrast(i).enhance(2.0)),
+    ('scale', lambda i: i.resize((i.size[0] * 2, i.size[1] * 2), Image.LANCZOS)),
+    ('original', lambda i: i),
+]
+
+
+def ocr_approach(img, transform):
+    """Preprocess img with one approach and OCR it."""
+    return pytesseract.image_to_string(transform(img), lang='tam+eng', config=AGE_GENDER_CONFIG)
+
+
+def ocr_fields(img, found_age='', found_gender=''):
+    """Run the preprocessing approaches on img until Age and Gender are both found.
+
+    Approaches run one after another so the later ones are skipped on an early
+    hit; parallelism comes from OCR-ing several cards at once on OCR_POOL.
+    """
+    for name, transform in OCR_APPROACHES:
+        try:
+            text = ocr_approach(img, transform)
+        except Exception:
+            continue
+
+        if not found_age:
+            found_age = extract_age(text)
+
+        if not found_gender:
+            found_gender = match_gender(text)
+
+        if found_age and found_gender:
+            break
+
+    return found_age, found_gender
+
+
+def card_digest(image_path):
+    """Hash a card's file contents together with the OCR settings that read it."""
+    digest = hashlib.blake2b(AGE_GENDER_CONFIG.encode('utf-8'), digest_size=16)
+    with open(image_path, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+class OcrStore:
+    """OCR results kept across sessions in SQLite; safe to use from any thread.
+
+    Holds OCR Retry results by card digest and raw card texts with their
+    confident tokens (used by Search Image and the load prefetch) by
+    (path, mtime). Falls back to an in-memory database if the file can't be opened.
+    """
+
+    def __init__(self, path=OCR_DB_PATH):
+        self._lock = threading.Lock()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+        except (OSError, sqlite3.Error):
+            self._db = sqlite3.connect(':memory:', check_same_thread=False)
+
+        with self._db:
+            self._db.execute('CREATE TABLE IF NOT EXISTS age_gender '
+                             '(hash TEXT PRIMARY KEY, age TEXT, gender TEXT)')
+            self._db.execute('CREATE TABLE IF NOT EXISTS card_ocr '
+                             '(path TEXT, mtime_ns INTEGER, text TEXT, tokens TEXT, PRIMARY KEY (path, mtime_ns))')
+
+    def get_age_gender(self, digest):
+        """Return the stored (age, gender) for a card digest, or None."""
+        with self._lock:
+            row = self._db.execute('SELECT age, gender FROM age_gender WHERE hash = ?', (digest,)).fetchone()
+        return row
+
+    def put_age_gender(self, digest, result):
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO age_gender VALUES (?, ?, ?)', (digest, *result))
+
+    def get_texts(self, keys):
+        """Return {(path, mtime_ns): (text, tokens)} for the keys that have a stored text."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                row = self._db.execute('SELECT text, tokens FROM card_ocr WHERE path = ? AND mtime_ns = ?',
+                                       (str(key[0]), key[1])).fetchone()
+                if row:
+                    found[key] = row
+        return found
+
+    def put_texts(self, items):
+        """Store ((path, mtime_ns), (text, tokens)) pairs."""
+        with self._lock, self._db:
+            self._db.executemany('INSERT OR REPLACE INTO card_ocr VALUES (?, ?, ?, ?)',
+                                 [(str(path), mtime_ns, text, tokens) for (path, mtime_ns), (text, tokens) in items])
+
+
+def ocr_age_gender(img):
+    """OCR a voter card for Age and Gender. Returns (age, gender), '' when not found."""
+    # Scale oversized scans down to about 300 DPI for a card; OCR time grows with pixels
+    width, height = img.size
+    scale = OCR_MAX_SIDE / max(width, height)
+    if scale < 1:
+        target = (int(width * scale), int(height * scale))
+        img.draft(None, target)  # Reduced-scale JPEG decode if not loaded yet
+        img = img.resize(target, Image.LANCZOS)
+        width, height = img.size
+
+    # Crop bottom portion where Age/Gender typically appears
+    bottom_crop = img.crop((0, int(height * 0.6), width, height))
+    found_age, found_gender = ocr_fields(bottom_crop)
+
+    # Fall back to the full image only when the bottom crop gave nothing
+    if not found_age and not found_gender:
+        found_age, found_gender = ocr_fields(img)
+
+    return found_age, found_gender
+
+
+class RowStore:
+    """The missing rows as parallel columns rather than one dict per row.
+
+    Missing flags are NumPy bool arrays, so filtering and progress counts are
+    array operations; text fields are plain lists indexed the same way.
+    """
+    TEXT_FIELDS = ('sno', 'part_no', 'source_folder', 'card_file', 'voter_id', 'name', 'age', 'gender')
+
+    def __init__(self, row_num=(), age_missing=(), gender_missing=(), **columns):
+        self.row_num = np.asarray(row_num, dtype=np.int32)        # Excel row number
+        self.age_missing = np.asarray(age_missing, dtype=bool)
+        self.gender_missing = np.asarray(gender_missing, dtype=bool)
+        for field in self.TEXT_FIELDS:
+            setattr(self, field, list(columns.get(field, ())))
+
+    def __len__(self):
+        return len(self.row_num)
+
+    def filter_mask(self, filter_type):
+        """Rows shown under the given filter, as a bool array."""
+        if filter_type == 'age':
+            return self.age_missing
+        if filter_type == 'gender':
+            return self.gender_missing
+        return np.ones(len(self), dtype=bool)
+
+    def passes_filter(self, i, filter_type):
+        """Check whether row i is shown under the given filter."""
+        return bool(self.filter_mask(filter_type)[i])
+
+    def fixed_count(self):
+        """Number of rows with both Age and Gender filled in."""
+        return int(np.count_nonzero(~(self.age_missing | self.gender_missing)))
+
+    def display(self, i):
+        """Listbox text for row i. Format: Row# | Part# | S.No | Age | Gender"""
+        age_status = '?' if self.age_missing[i] else str(self.age[i])[:3]
+        gender_status = '?' if self.gender_missing[i] else self.gender[i][0] if self.gender[i] else '?'
+
+        return f"R{self.row_num[i]:4d} | P:{self.part_no[i]:>2s} | #{self.sno[i]:>3s} | A:{age_status:3s} G:{gender_status}"
+
+    def color(self, i):
+        """Listbox text color for row i."""
+        if self.age_missing[i] and self.gender_missing[i]:
+            return '#F44336'  # Red - both missing
+        elif self.age_missing[i]:
+            return '#FF9800'  # Orange - age missing
+        else:
+            return '#9C27B0'  # Purple - gender missing
 
 
 class MissingDataFinder:
@@ -56,13 +542,25 @@ class MissingDataFinder:
 
         # Data
         self.excel_path = None
-        self.workbook = None
-        self.worksheet = None
+        self.pending_changes = {}  # row_num -> (age, gender), written on save
         self.image_folder = None
-        self.missing_rows = []  # List of row data dictionaries
+        self.missing_rows = RowStore()  # Rows with missing Age/Gender
+        self._suspend_redraw = False  # Set while apply_and_next defers the list selection to next_row
+        self._filtered_indices = []  # Listbox position -> missing_rows index, rebuilt by apply_filter
+        self._filtered_positions = {}  # missing_rows index -> listbox position (the inverse)
+        self._row_colors = []  # Listbox position -> text color, applied lazily to visible rows
+        self._colored_rows = set()
+        self._color_pending = False
         self.current_index = 0
         self.current_image = None
+        self.current_image_path = None
+        self.current_pil_image = None
         self.changes_made = False
+        self._ocr_cache = {}  # (image path, mtime) -> (OCR text, confident tokens), reused across searches
+        self._folder_index = {}  # image subfolder -> sorted card image paths
+        self._folder_stem_index = {}  # subfolder name -> {card stem: image path}
+        self._prefetch_token = 0  # Bumped per Excel load so an old prefetch stops
+        self._ocr_store = OcrStore()  # OCR results from earlier sessions
 
         self.style = ttk.Style()
         self.style.configure('Title.TLabel', font=('Helvetica', 14, 'bold'))
@@ -71,6 +569,68 @@ class MissingDataFinder:
 
         self.create_widgets()
 
+        # Image decoding and OCR run on a worker thread; results come back through
+        # a queue polled from the Tk main loop, since Tk isn't thread-safe.
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._load_token = 0  # Bumped per image load so stale results are dropped
+        threading.Thread(target=self._worker_loop, daemon=True).start()
+        self.root.after(50, self._poll_results)
+
+        # OCR runs on OCR_POOL so a slow Tesseract run doesn't hold up image loads;
+        # next-row guesses get their own threads so they never queue ahead of OCR Retry
+        self._speculative_pool = ThreadPoolExecutor(max_workers=2)
+        self._speculative = {}  # Image path -> in-flight speculative OCR future
+        # Search Image OCRs whole folders; its own thread keeps image loads from queuing behind it
+        self._search_pool = ThreadPoolExecutor(max_workers=1)
+
+    def _worker_loop(self):
+        """Run queued background jobs one at a time."""
+        while True:
+            func, args, callback = self._jobs.get()
+            try:
+                result, error = func(*args), None
+            except Exception as e:
+                result, error = None, e
+            self._results.put((callback, result, error))
+
+    def _poll_results(self):
+        """Deliver finished background jobs to their callbacks on the Tk thread."""
+        try:
+            while True:
+                callback, result, error = self._results.get_nowait()
+                callback(result, error)
+        except queue.Empty:
+            pass
+        self.root.after(50, self._poll_results)
+
+    def run_in_background(self, func, args, callback):
+        """Run func(*args) on the worker thread, then callback(result, error) on the Tk thread."""
+        self._jobs.put((func, args, callback))
+
+    def run_ocr_in_background(self, func, args, callback):
+        """Like run_in_background, but on OCR_POOL so image loads aren't queued behind it."""
+        self.deliver_when_done(OCR_POOL.submit(func, *args), callback)
+
+    def deliver_when_done(self, future, callback):
+        """Call callback(result, error) on the Tk thread once future finishes."""
+        def finished(future):
+            error = future.exception()
+            self._results.put((callback, None if error else future.result(), error))
+
+        future.add_done_callback(finished)
+
+    def post_status(self, text, index=None):
+        """Show a status message in the image area (callable from any thread).
+
+        With index, the message is dropped if the user has moved off that row.
+        """
+        def show(result, error):
+            if index is None or index == self.current_index:
+                self.image_label.configure(image='', text=result)
+
+        self._results.put((show, text, None))
+
     def create_widgets(self):
         # Main container
         main_frame = ttk.Frame(self.root, padding="10")
@@ -116,13 +676,14 @@ class MissingDataFinder:
         list_container.pack(fill=tk.BOTH, expand=True)
 
         self.row_listbox = tk.Listbox(list_container, width=50, height=25, font=('Courier', 9))
-        scrollbar = ttk.Scrollbar(list_container, orient=tk.VERTICAL, command=self.row_listbox.yview)
-        self.row_listbox.configure(yscrollcommand=scrollbar.set)
+        self.row_scrollbar = ttk.Scrollbar(list_container, orient=tk.VERTICAL, command=self.row_listbox.yview)
+        self.row_listbox.configure(yscrollcommand=self.on_list_scroll)
 
         self.row_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.row_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
         self.row_listbox.bind('<<ListboxSelect>>', self.on_row_select)
+        self.row_listbox.bind('<Configure>', lambda e: self.schedule_row_colors())
 
         # Filter options
         filter_frame = ttk.Frame(left_frame)
@@ -220,6 +781,8 @@ class MissingDataFinder:
 
         ttk.Button(btn_row, text="Search Image", command=self.search_image, width=14).pack(side=tk.LEFT, padx=10)
         ttk.Button(btn_row, text="OCR Retry", command=self.ocr_retry, width=12).pack(side=tk.LEFT, padx=2)
+        self.verbose_ocr = tk.BooleanVar(value=False)  # Show OCR Retry results in a dialog instead of the status bar
+        ttk.Checkbutton(btn_row, text="Popup", variable=self.verbose_ocr).pack(side=tk.LEFT, padx=(0, 10))
 
         ttk.Button(btn_row, text="Apply", command=self.apply_changes, width=12).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_row, text="Apply & Next", command=self.apply_and_next, width=14).pack(side=tk.LEFT, padx=2)
@@ -287,15 +850,20 @@ class MissingDataFinder:
             self.image_folder = Path(image_folder)
 
         try:
+            self.index_image_folder()
+
             self.excel_path = Path(excel_path)
-            self.workbook = load_workbook(self.excel_path)
-            self.worksheet = self.workbook.active
+            self.pending_changes = {}
 
-            # Find missing rows
-            self.find_missing_rows()
+            # Scan in read-only mode; edits are applied to a full workbook on save
+            workbook = load_workbook(self.excel_path, read_only=True, data_only=True,
+                                     keep_vba=False, keep_links=False)
+            try:
+                total_rows = self.find_missing_rows(workbook.active)
+            finally:
+                workbook.close()
 
             # Update stats
-            total_rows = self.worksheet.max_row - 1  # Exclude header
             missing_count = len(self.missing_rows)
             self.stats_var.set(f"Loaded: {total_rows:,} rows | Missing: {missing_count:,}")
 
@@ -306,88 +874,141 @@ class MissingDataFinder:
                 self.row_listbox.selection_set(0)
                 self.on_row_select(None)
 
+            # OCR the missing rows' cards while the user works through the list
+            self._prefetch_token += 1
+            threading.Thread(target=self._prefetch_ocr,
+                             args=(self._prefetch_token, self.missing_rows),
+                             daemon=True).start()
+
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load Excel: {e}")
             import traceback
             traceback.print_exc()
 
-    def find_missing_rows(self):
-        """Find all rows with missing Age or Gender."""
-        self.missing_rows = []
+    def index_image_folder(self):
+        """List card images per subfolder once, so searches don't rescan the disk."""
+        self._folder_index = {}
+        self._folder_stem_index = {}
+        if not self.image_folder:
+            return
 
-        # Column indices for v4.0 format (1-based)
+        for entry in os.scandir(self.image_folder):
+            if not entry.is_dir():
+                continue
+            files = [Path(f.path) for f in os.scandir(entry.path)
+                     if f.name.endswith(('.png', '.jpg', '.jpeg')) and f.is_file()]
+
+            # Extension preference when a card exists in several formats: .png, .jpg, .jpeg
+            stems = {}
+            for suffix in ('.png', '.jpg', '.jpeg'):
+                for f in files:
+                    if f.suffix == suffix:
+                        stems.setdefault(f.stem, f)
+            self._folder_stem_index[entry.name] = stems
+
+            images = [f for f in files if f.suffix in ('.png', '.jpg')]
+            images.sort(key=lambda x: int(x.stem) if x.stem.isdigit() else 0)
+            self._folder_index[Path(entry.path)] = images
+
+    def find_missing_rows(self, worksheet):
+        """Find all rows with missing Age or Gender. Returns the number of data rows."""
+        self.missing_rows = RowStore()
+
+        # Column layout for v4.0 format (Age is column 8, Gender is column 9)
         # Headers: S.No, Part No., Voter ID, Name, Relation Type, Relation Name, House No, Age, Gender, Constituency, Source Folder, Card File
-        sno_col = 1           # S.No
-        part_col = 2          # Part No.
-        voter_id_col = 3
-        name_col = 4
-        age_col = 8
-        gender_col = 9
-        source_folder_col = 11  # Source Folder (folder name)
-        card_file_col = 12      # Card File (image filename like 1.png)
-
-        for row_num in range(2, self.worksheet.max_row + 1):
-            sno_val = self.worksheet.cell(row=row_num, column=sno_col).value
-            part_no = self.worksheet.cell(row=row_num, column=part_col).value
-            voter_id = self.worksheet.cell(row=row_num, column=voter_id_col).value
-            name = self.worksheet.cell(row=row_num, column=name_col).value
-            age_val = self.worksheet.cell(row=row_num, column=age_col).value
-            gender_val = self.worksheet.cell(row=row_num, column=gender_col).value
-            source_folder = self.worksheet.cell(row=row_num, column=source_folder_col).value
-            card_file = self.worksheet.cell(row=row_num, column=card_file_col).value
-
-            age_missing = not age_val or str(age_val).strip() == ''
-            gender_missing = not gender_val or str(gender_val).strip() == ''
-
-            if age_missing or gender_missing:
-                self.missing_rows.append({
-                    'row_num': row_num,
-                    'sno': sno_val,                           # S.No (1, 2, 3...)
-                    'part_no': str(part_no) if part_no else '',
-                    'source_folder': source_folder or '',     # Folder name from Excel
-                    'card_file': card_file or '',             # Image filename from Excel (1.png)
-                    'age': age_val or '',
-                    'gender': gender_val or '',
-                    'age_missing': age_missing,
-                    'gender_missing': gender_missing,
-                    'voter_id': voter_id or '',
-                    'name': name or ''
-                })
+        rows = list(worksheet.iter_rows(min_row=2, min_col=1, max_col=12, values_only=True))
+        if not rows:
+            return 0
+
+        # Missing flags for the Age and Gender columns of every row in one array pass
+        table = np.empty((len(rows), 12), dtype=object)
+        table[:] = rows
+        missing = IS_MISSING(table[:, 7:9]).astype(bool)
+
+        hits = np.flatnonzero(missing.any(axis=1))
+        found = table[hits].T.tolist()
+        self.missing_rows = RowStore(
+            row_num=hits + 2,
+            age_missing=missing[hits, 0],
+            gender_missing=missing[hits, 1],
+            sno=found[0],                                              # S.No (1, 2, 3...)
+            part_no=[str(v) if v else '' for v in found[1]],
+            voter_id=[v or '' for v in found[2]],
+            name=[v or '' for v in found[3]],
+            age=[v or '' for v in found[7]],
+            gender=[v or '' for v in found[8]],
+            source_folder=[v or '' for v in found[10]],                # Folder name from Excel
+            card_file=[v or '' for v in found[11]],                    # Image filename from Excel (1.png)
+        )
+
+        return len(rows)
 
     def apply_filter(self):
         """Apply filter and update listbox."""
         self.row_listbox.delete(0, tk.END)
 
         filter_type = self.filter_var.get()
+        self._filtered_indices = np.flatnonzero(self.missing_rows.filter_mask(filter_type)).tolist()
 
-        for i, row_data in enumerate(self.missing_rows):
-            if filter_type == 'age' and not row_data['age_missing']:
-                continue
-            if filter_type == 'gender' and not row_data['gender_missing']:
-                continue
-
-            # Format: Row# | Part# | S.No | Age | Gender
-            age_status = '?' if row_data['age_missing'] else str(row_data['age'])[:3]
-            gender_status = '?' if row_data['gender_missing'] else row_data['gender'][0] if row_data['gender'] else '?'
+        self._filtered_positions = {i: pos for pos, i in enumerate(self._filtered_indices)}
+        displays = [self.missing_rows.display(i) for i in self._filtered_indices]
+        self._row_colors = [self.missing_rows.color(i) for i in self._filtered_indices]
 
-            display = f"R{row_data['row_num']:4d} | P:{row_data['part_no']:>2s} | #{row_data['sno']:>3s} | A:{age_status:3s} G:{gender_status}"
-            self.row_listbox.insert(tk.END, display)
-
-            # Color code
-            if row_data['age_missing'] and row_data['gender_missing']:
-                self.row_listbox.itemconfig(tk.END, fg='#F44336')  # Red - both missing
-            elif row_data['age_missing']:
-                self.row_listbox.itemconfig(tk.END, fg='#FF9800')  # Orange - age missing
-            else:
-                self.row_listbox.itemconfig(tk.END, fg='#9C27B0')  # Purple - gender missing
+        # One Tcl call for all rows; colors are applied as rows scroll into view
+        if displays:
+            self.row_listbox.insert(tk.END, *displays)
+        self._colored_rows = set()
+        self.schedule_row_colors()
 
         # Update progress
         self.update_progress()
 
+    def refresh_list_row(self, index):
+        """Redraw one row's listbox entry in place instead of rebuilding the list."""
+        pos = self._filtered_positions.get(index)
+        if pos is None:
+            return
+
+        self.row_listbox.delete(pos)
+        self.row_listbox.insert(pos, self.missing_rows.display(index))
+        self._row_colors[pos] = self.missing_rows.color(index)
+        self.row_listbox.itemconfig(pos, fg=self._row_colors[pos])
+        self._colored_rows.add(pos)
+
+    @staticmethod
+    def set_var(var, value):
+        """Set a Tk variable only if its value changes, sparing the trace and redraw."""
+        if var.get() != str(value):
+            var.set(value)
+
+    def on_list_scroll(self, first, last):
+        """Keep the scrollbar in sync and color rows scrolled into view."""
+        self.row_scrollbar.set(first, last)
+        self.schedule_row_colors()
+
+    def schedule_row_colors(self):
+        """Color the visible rows once Tk is idle (coalesces bursts of scroll events)."""
+        if not self._color_pending:
+            self._color_pending = True
+            self.root.after_idle(self.color_visible_rows)
+
+    def color_visible_rows(self):
+        """Apply the text color to listbox rows currently on screen."""
+        self._color_pending = False
+        if not self._row_colors:
+            return
+
+        first = self.row_listbox.nearest(0)
+        last = self.row_listbox.nearest(self.row_listbox.winfo_height())
+        for index in range(first, min(last + 1, len(self._row_colors))):
+            if index not in self._colored_rows:
+                self.row_listbox.itemconfig(index, fg=self._row_colors[index])
+                self._colored_rows.add(index)
+
     def update_progress(self):
         """Update progress display."""
         total = len(self.missing_rows)
-        fixed = sum(1 for r in self.missing_rows if not r['age_missing'] and not r['gender_missing'])
+        fixed = self.missing_rows.fixed_count()
         self.progress_var.set(f"Fixed: {fixed}/{total}")
 
     def on_row_select(self, event):
@@ -398,19 +1019,9 @@ class MissingDataFinder:
 
         index = selection[0]
 
-        # Map listbox index to missing_rows index based on filter
-        filter_type = self.filter_var.get()
-        filtered_indices = []
-
-        for i, row_data in enumerate(self.missing_rows):
-            if filter_type == 'age' and not row_data['age_missing']:
-                continue
-            if filter_type == 'gender' and not row_data['gender_missing']:
-                continue
-            filtered_indices.append(i)
-
-        if index < len(filtered_indices):
-            self.current_index = filtered_indices[index]
+        # Map listbox index to missing_rows index (built by apply_filter)
+        if index < len(self._filtered_indices):
+            self.current_index = self._filtered_indices[index]
             self.display_current_row()
 
     def display_current_row(self):
@@ -418,30 +1029,30 @@ class MissingDataFinder:
         if not self.missing_rows or self.current_index >= len(self.missing_rows):
             return
 
-        row_data = self.missing_rows[self.current_index]
+        rows, i = self.missing_rows, self.current_index
 
         # Update info displays
-        self.current_row_var.set(f"{row_data['row_num']}")
-        self.current_part_var.set(f"{row_data['part_no']}")
+        self.set_var(self.current_row_var, f"{rows.row_num[i]}")
+        self.set_var(self.current_part_var, f"{rows.part_no[i]}")
 
         # Show image path: source_folder/card_file
-        source_folder = row_data['source_folder'] or f"Part-{row_data['part_no']}"
-        card_file = row_data['card_file'] or f"{row_data['sno']}.png"
-        self.current_img_var.set(f"{source_folder[:25]}.../{card_file}" if len(source_folder) > 25 else f"{source_folder}/{card_file}")
+        source_folder = rows.source_folder[i] or f"Part-{rows.part_no[i]}"
+        card_file = rows.card_file[i] or f"{rows.sno[i]}.png"
+        self.set_var(self.current_img_var, f"{source_folder[:25]}.../{card_file}" if len(source_folder) > 25 else f"{source_folder}/{card_file}")
 
-        self.voter_id_var.set(row_data['voter_id'])
-        self.voter_name_var.set(row_data['name'])
+        self.set_var(self.voter_id_var, rows.voter_id[i])
+        self.set_var(self.voter_name_var, rows.name[i])
 
         # Update input fields
-        self.age_var.set(row_data['age'])
-        self.gender_var.set(row_data['gender'])
+        self.set_var(self.age_var, rows.age[i])
+        self.set_var(self.gender_var, rows.gender[i])
 
         # Update status indicators
-        self.age_status_var.set("MISSING" if row_data['age_missing'] else "")
-        self.gender_status_var.set("MISSING" if row_data['gender_missing'] else "")
+        self.set_var(self.age_status_var, "MISSING" if rows.age_missing[i] else "")
+        self.set_var(self.gender_status_var, "MISSING" if rows.gender_missing[i] else "")
 
         # Load and display image using Source Folder and Card File from Excel
-        self.load_image(row_data['source_folder'], row_data['card_file'])
+        self.load_image(rows.source_folder[i], rows.card_file[i])
 
     def load_image(self, source_folder, card_file):
         """Load and display the voter card image.
@@ -462,61 +1073,146 @@ class MissingDataFinder:
             self.image_label.configure(image='', text=f"No Card File in Excel\n\nSource Folder: {source_folder}\n\nClick 'Search Image' to find by Voter ID")
             return
 
+        image_path = self.find_card_image(source_folder, card_file)
+
+        if not image_path:
+            # Check if the folder exists
+            folder_path = self.image_folder / source_folder
+            if folder_path not in self._folder_index:
+                self.image_label.configure(image='',
+                    text=f"Folder not found:\n{folder_path}\n\nClick 'Search Image' to find by Voter ID")
+            else:
+                # List available images in folder
+                try:
+                    available = self._folder_index[folder_path][:5]
+                    available_str = ", ".join([p.name for p in available])
+                    self.image_label.configure(image='',
+                        text=f"Image not found:\n{card_file}\n\nFolder: {source_folder}\nAvailable: {available_str}...\n\nClick 'Search Image' to find by Voter ID")
+                except:
+                    self.image_label.configure(image='', text=f"Image not found:\n{folder_path / card_file}\n\nClick 'Search Image' to find by Voter ID")
+            return
+
+        self.show_image(image_path)
+
+    def find_card_image(self, source_folder, card_file):
+        """Locate a card image, whatever its extension. Returns None if missing."""
+        # Look the stem up in the folder listing taken at load (no disk access)
+        image_path = self._folder_stem_index.get(source_folder, {}).get(Path(card_file).stem)
+        if image_path:
+            return image_path
+
         # Construct image path: {image_folder}/{source_folder}/{card_file}
         image_path = self.image_folder / source_folder / card_file
+        return image_path if image_path.exists() else None
 
-        if not image_path.exists():
-            # Try alternate extensions
-            card_stem = Path(card_file).stem
-            alt_paths = [
-                self.image_folder / source_folder / f"{card_stem}.png",
-                self.image_folder / source_folder / f"{card_stem}.jpg",
-                self.image_folder / source_folder / f"{card_stem}.jpeg",
-            ]
-            found = False
-            for alt in alt_paths:
-                if alt.exists():
-                    image_path = alt
-                    found = True
-                    break
+    def _prefetch_ocr(self, token, rows):
+        """OCR the missing rows' cards in big batches and fill in what OCR finds.
 
-            if not found:
-                # Check if the folder exists
-                folder_path = self.image_folder / source_folder
-                if not folder_path.exists():
-                    self.image_label.configure(image='',
-                        text=f"Folder not found:\n{folder_path}\n\nClick 'Search Image' to find by Voter ID")
+        Runs on its own thread. Texts go into the OCR cache, so Search Image
+        reuses them, and any missing Age/Gender found is pre-filled as a
+        proposal the user still has to Apply.
+        """
+        if not self.image_folder:
+            return
+
+        jobs = []
+        for index in range(len(rows)):
+            source_folder, card_file = rows.source_folder[index], rows.card_file[index]
+            if not source_folder or not card_file:
+                continue
+            image_path = self.find_card_image(source_folder, card_file)
+            if not image_path:
+                continue
+            try:
+                key = (image_path, image_path.stat().st_mtime_ns)
+            except OSError:
+                continue
+            jobs.append((index, key))
+
+        # Cards read in an earlier session are proposed straight from the store
+        stored = self._ocr_store.get_texts(key for _, key in jobs)
+        self._ocr_cache.update(stored)
+        self._post_ocr_proposals(token, [(index, stored[key][0]) for index, key in jobs if key in stored])
+        jobs = [(index, key) for index, key in jobs if key not in stored]
+
+        batches = [jobs[i:i + PREFETCH_BATCH_SIZE] for i in range(0, len(jobs), PREFETCH_BATCH_SIZE)]
+        with ThreadPoolExecutor(max_workers=OCR_WORKERS) as executor:
+            futures = [executor.submit(ocr_images_words, [key[0] for _, key in batch])
+                       for batch in batches]
+
+            for batch, future in zip(batches, futures):
+                if token != self._prefetch_token:
+                    for pending in futures:
+                        pending.cancel()
+                    return
+                try:
+                    results = [(text, confident_tokens(words)) for text, words in future.result()]
+                except Exception:
+                    continue
+
+                for (index, key), result in zip(batch, results):
+                    self._ocr_cache[key] = result
+                self._ocr_store.put_texts((key, result) for (index, key), result in zip(batch, results))
+                self._post_ocr_proposals(token, [(index, text) for (index, key), (text, tokens) in zip(batch, results)])
+
+    def _post_ocr_proposals(self, token, texts):
+        """Parse (row index, OCR text) pairs and hand any Age/Gender found to the Tk thread."""
+        proposals = []
+        for index, text in texts:
+            found_age, found_gender = parse_age_gender(text)
+            if found_age or found_gender:
+                proposals.append((index, found_age, found_gender))
+
+        if proposals:
+            self._results.put((self._apply_ocr_proposals, (token, proposals), None))
+
+    def _apply_ocr_proposals(self, result, error):
+        """Pre-fill still-missing fields with prefetched OCR values (Tk thread)."""
+        token, proposals = result
+        if token != self._prefetch_token:
+            return
+
+        rows = self.missing_rows
+        for index, found_age, found_gender in proposals:
+            # Only propose for fields that are still empty
+            if found_age and rows.age_missing[index] and not rows.age[index]:
+                rows.age[index] = found_age
+                if index == self.current_index and not self.age_var.get().strip():
+                    self.age_var.set(found_age)
+            if found_gender and rows.gender_missing[index] and not rows.gender[index]:
+                rows.gender[index] = found_gender
+                if index == self.current_index and not self.gender_var.get().strip():
+                    self.gender_var.set(found_gender)
+
+    def show_image(self, image_path, on_shown=None, on_error=None):
+        """Decode the image in the background, then display it and keep it for OCR."""
+        self._load_token += 1
+        token = self._load_token
+
+        def done(result, error):
+            if token != self._load_token:
+                return  # A newer image was requested meanwhile
+            if error:
+                if on_error:
+                    on_error(error)
                 else:
-                    # List available images in folder
-                    try:
-                        available = sorted(list(folder_path.glob("*.png")) + list(folder_path.glob("*.jpg")),
-                                         key=lambda x: int(x.stem) if x.stem.isdigit() else 0)[:5]
-                        available_str = ", ".join([p.name for p in available])
-                        self.image_label.configure(image='',
-                            text=f"Image not found:\n{card_file}\n\nFolder: {source_folder}\nAvailable: {available_str}...\n\nClick 'Search Image' to find by Voter ID")
-                    except:
-                        self.image_label.configure(image='', text=f"Image not found:\n{image_path}\n\nClick 'Search Image' to find by Voter ID")
+                    self.image_label.configure(image='', text=f"Error loading image:\n{error}")
                 return
 
-        try:
-            # Load and resize image to fit
-            img = Image.open(image_path)
-
-            # Calculate resize to fit in label (max 700x500)
-            max_width, max_height = 700, 500
-            ratio = min(max_width / img.width, max_height / img.height)
-            new_size = (int(img.width * ratio), int(img.height * ratio))
-            img = img.resize(new_size, Image.LANCZOS)
+            display, full_image = result
 
-            # Convert to PhotoImage
-            self.current_image = ImageTk.PhotoImage(img)
+            # Convert to PhotoImage (must happen on the Tk thread)
+            self.current_image = ImageTk.PhotoImage(display)
             self.image_label.configure(image=self.current_image, text='')
 
-            # Store PIL image for OCR
-            self.current_pil_image = Image.open(image_path)
+            # Store PIL image for OCR (only if it was decoded at full size)
+            self.current_image_path = Path(image_path)
+            self.current_pil_image = full_image
 
-        except Exception as e:
-            self.image_label.configure(image='', text=f"Error loading image:\n{e}")
+            if on_shown:
+                on_shown()
+
+        self.run_in_background(decode_for_display, (image_path,), done)
 
     def search_image(self):
         """Search for the correct image by matching Voter ID and Name using OCR."""
@@ -528,10 +1224,9 @@ class MissingDataFinder:
             messagebox.showwarning("Warning", "Image folder not set")
             return
 
-        row_data = self.missing_rows[self.current_index]
-        voter_id = row_data.get('voter_id', '')
-        name = row_data.get('name', '')
-        source_folder = row_data.get('source_folder', '')
+        voter_id = self.missing_rows.voter_id[self.current_index]
+        name = self.missing_rows.name[self.current_index]
+        source_folder = self.missing_rows.source_folder[self.current_index]
 
         if not voter_id:
             messagebox.showwarning("Warning", "No Voter ID found for this row")
@@ -539,43 +1234,41 @@ class MissingDataFinder:
 
         # Update UI to show searching
         self.image_label.configure(image='', text=f"Searching for Voter ID: {voter_id}...\n\nThis may take a while as we OCR each image.")
-        self.root.update()
+        index = self.current_index
 
-        # Perform search
-        found_path = self.search_image_by_voter_id(voter_id, name, source_folder)
-
-        if found_path:
-            try:
-                # Load and display the found image
-                img = Image.open(found_path)
+        def done(found_path, error):
+            if index != self.current_index:
+                return  # User moved to another row meanwhile; don't show this card there
+            if error:
+                messagebox.showerror("Error", f"Image search failed:\n{error}")
+                return
 
-                # Calculate resize to fit in label (max 700x500)
-                max_width, max_height = 700, 500
-                ratio = min(max_width / img.width, max_height / img.height)
-                new_size = (int(img.width * ratio), int(img.height * ratio))
-                img_resized = img.resize(new_size, Image.LANCZOS)
+            if found_path:
+                def shown():
+                    # Update the image info
+                    found_path_obj = Path(found_path)
+                    self.current_img_var.set(f"Found: {found_path_obj.parent.name}/{found_path_obj.name}")
 
-                # Convert to PhotoImage
-                self.current_image = ImageTk.PhotoImage(img_resized)
-                self.image_label.configure(image=self.current_image, text='')
+                    messagebox.showinfo("Found", f"Image found!\n\nPath: {found_path}")
 
-                # Store PIL image for OCR
-                self.current_pil_image = Image.open(found_path)
+                def failed(e):
+                    messagebox.showerror("Error", f"Found image but failed to load:\n{found_path}\n\n{e}")
 
-                # Update the image info
-                found_path_obj = Path(found_path)
-                self.current_img_var.set(f"Found: {found_path_obj.parent.name}/{found_path_obj.name}")
+                # Load and display the found image
+                self.show_image(found_path, on_shown=shown, on_error=failed)
+            else:
+                self.image_label.configure(image='', text=f"Image NOT found for:\nVoter ID: {voter_id}\nName: {name}\n\nSearched in: {source_folder or 'all folders'}")
+                messagebox.showwarning("Not Found", f"Could not find image matching:\nVoter ID: {voter_id}\nName: {name}")
 
-                messagebox.showinfo("Found", f"Image found!\n\nPath: {found_path}")
+        # Perform search
+        self.deliver_when_done(
+            self._search_pool.submit(self.search_image_by_voter_id, voter_id, name, source_folder, index), done)
 
-            except Exception as e:
-                messagebox.showerror("Error", f"Found image but failed to load:\n{found_path}\n\n{e}")
-        else:
-            self.image_label.configure(image='', text=f"Image NOT found for:\nVoter ID: {voter_id}\nName: {name}\n\nSearched in: {source_folder or 'all folders'}")
-            messagebox.showwarning("Not Found", f"Could not find image matching:\nVoter ID: {voter_id}\nName: {name}")
+    def search_image_by_voter_id(self, voter_id, name, source_folder, index=None):
+        """Search for image by matching Voter ID and Name using OCR. Runs on the search thread.
 
-    def search_image_by_voter_id(self, voter_id, name, source_folder):
-        """Search for image by matching Voter ID and Name using OCR."""
+        index is the row searched for; progress messages are only shown while it is current.
+        """
         if not self.image_folder or not voter_id:
             return None
 
@@ -583,123 +1276,99 @@ class MissingDataFinder:
         search_folders = []
         if source_folder:
             specific_folder = self.image_folder / source_folder
-            if specific_folder.exists():
+            if specific_folder in self._folder_index:
                 search_folders.append(specific_folder)
 
         # If not found in specific folder, search all folders
         if not search_folders:
-            search_folders = [f for f in self.image_folder.iterdir() if f.is_dir()]
+            search_folders = list(self._folder_index)
 
         voter_id_clean = str(voter_id).strip().upper()
 
         for folder in search_folders:
-            # Look for both .png and .jpg files
-            image_files = sorted(
-                list(folder.glob("*.png")) + list(folder.glob("*.jpg")),
-                key=lambda x: int(x.stem) if x.stem.isdigit() else 0
-            )
+            # .png and .jpg files, indexed when the Excel was loaded
+            image_files = self._folder_index[folder]
 
             # Update status during search
-            self.image_label.configure(text=f"Searching in: {folder.name}\n({len(image_files)} images)")
-            self.root.update()
+            self.post_status(f"Searching in: {folder.name}\n({len(image_files)} images)", index)
 
+            # Images already OCR'd (this session or a saved one) are checked without Tesseract
+            cache_keys = {}
             for img_path in image_files:
                 try:
-                    img = Image.open(img_path)
-                    text = pytesseract.image_to_string(img, lang='tam+eng', config=TESSERACT_CONFIG)
+                    cache_keys[img_path] = (img_path, img_path.stat().st_mtime_ns)
+                except OSError:
+                    continue
 
-                    # Check if Voter ID matches
-                    if voter_id_clean in text.upper():
-                        return str(img_path)
+            self._ocr_cache.update(self._ocr_store.get_texts(
+                key for key in cache_keys.values() if key not in self._ocr_cache))
 
-                    # Also try matching name if Voter ID not found
-                    if name and len(name) > 3:
-                        if name in text:
-                            return str(img_path)
+            uncached = []
+            for img_path, key in cache_keys.items():
+                cached = self._ocr_cache.get(key)
+                if cached is None:
+                    uncached.append(img_path)
+                elif self._tokens_match(*cached, voter_id_clean, name):
+                    return str(img_path)
 
-                except Exception as e:
-                    continue
+            # Split so every worker gets a share, but keep batches small enough to stop early
+            batch_size = max(1, min(OCR_BATCH_SIZE, -(-len(uncached) // OCR_WORKERS)))
+            batches = [uncached[i:i + batch_size] for i in range(0, len(uncached), batch_size)]
+
+            # Each batch is its own tesseract subprocess, so threads are enough to run them in parallel
+            with ThreadPoolExecutor(max_workers=OCR_WORKERS) as executor:
+                futures = [executor.submit(ocr_images_words, batch, max_side=SEARCH_OCR_MAX_SIDE)
+                           for batch in batches]
+
+                # Check in order so the first matching image still wins
+                for batch, future in zip(batches, futures):
+                    try:
+                        results = [(text, confident_tokens(words)) for text, words in future.result()]
+                    except Exception:
+                        continue
+
+                    self._ocr_store.put_texts((cache_keys[img_path], result) for img_path, result in zip(batch, results))
+                    for img_path, result in zip(batch, results):
+                        self._ocr_cache[cache_keys[img_path]] = result
+                        if self._tokens_match(*result, voter_id_clean, name):
+                            for pending in futures:
+                                pending.cancel()
+                            return str(img_path)
 
         return None
 
+    @staticmethod
+    def _tokens_match(text, tokens, voter_id_clean, name):
+        """Check for the Voter ID among the confidently read tokens, or the name in the text."""
+        if voter_id_clean in tokens.split():
+            return True
+        return bool(name and len(name) > 3 and name in text)
+
     def ocr_retry(self):
         """Retry OCR on the current image to extract Age and Gender."""
-        if not hasattr(self, 'current_pil_image'):
+        if not self.current_image_path:
             messagebox.showwarning("Warning", "No image loaded")
             return
 
         try:
-            img = self.current_pil_image
-            width, height = img.size
-
-            # Crop bottom portion where Age/Gender typically appears
-            bottom_crop = img.crop((0, int(height * 0.6), width, height))
-
-            # Try different preprocessing approaches
-            approaches = [
-                ('original', lambda i: i),
-                ('contrast', lambda i: ImageEnhance.Contrast(i).enhance(2.0)),
-                ('grayscale', lambda i: i.convert('L')),
-                ('binarize', lambda i: i.convert('L').point(lambda x: 0 if x < 140 else 255, '1')),
-                ('scale', lambda i: i.resize((i.size[0] * 2, i.size[1] * 2), Image.LANCZOS)),
-            ]
-
-            found_age = ''
-            found_gender = ''
-
-            for name, transform in approaches:
-                try:
-                    processed = transform(bottom_crop)
-                    text = pytesseract.image_to_string(processed, lang='tam+eng', config=TESSERACT_CONFIG)
-
-                    # Extract age
-                    if not found_age:
-                        age_match = re.search(r'வயது\s*:\s*(\d+)', text)
-                        if age_match:
-                            found_age = age_match.group(1)
-
-                    # Extract gender
-                    if not found_gender:
-                        if 'பாலினம்' in text:
-                            if 'ஆண்' in text:
-                                found_gender = 'Male'
-                            elif 'பெண்' in text:
-                                found_gender = 'Female'
-                            elif 'திருநங்கை' in text or 'மூன்றாம்' in text or 'Third' in text:
-                                found_gender = 'Third Gender'
-
-                    if found_age and found_gender:
-                        break
+            # Image.open only reads the header; decoding happens on the worker
+            img = self.current_pil_image or Image.open(self.current_image_path)
+        except Exception as e:
+            messagebox.showerror("OCR Error", f"Failed to run OCR:\n{e}")
+            return
 
-                except Exception:
-                    continue
+        index = self.current_index
+        self.age_status_var.set("OCR...")
+        self.gender_status_var.set("OCR...")
 
-            # If not found in bottom, try full image
-            if not found_age or not found_gender:
-                for name, transform in approaches:
-                    try:
-                        processed = transform(img)
-                        text = pytesseract.image_to_string(processed, lang='tam+eng', config=TESSERACT_CONFIG)
-
-                        if not found_age:
-                            age_match = re.search(r'வயது\s*:\s*(\d+)', text)
-                            if age_match:
-                                found_age = age_match.group(1)
-
-                        if not found_gender:
-                            if 'பாலினம்' in text:
-                                if 'ஆண்' in text:
-                                    found_gender = 'Male'
-                                elif 'பெண்' in text:
-                                    found_gender = 'Female'
-                                elif 'திருநங்கை' in text or 'மூன்றாம்' in text or 'Third' in text:
-                                    found_gender = 'Third Gender'
-
-                        if found_age and found_gender:
-                            break
+        def done(result, error):
+            if index != self.current_index:
+                return  # User moved to another row meanwhile
+            if error:
+                messagebox.showerror("OCR Error", f"Failed to run OCR:\n{error}")
+                return
 
-                    except Exception:
-                        continue
+            found_age, found_gender = result
 
             # Update fields if found
             if found_age:
@@ -715,18 +1384,40 @@ class MissingDataFinder:
                 self.gender_status_var.set("NOT FOUND")
 
             result_msg = f"Age: {'Found - ' + found_age if found_age else 'Not found'}\nGender: {'Found - ' + found_gender if found_gender else 'Not found'}"
-            messagebox.showinfo("OCR Result", result_msg)
+            if self.verbose_ocr.get():
+                messagebox.showinfo("OCR Result", result_msg)
+            else:
+                self.save_status_var.set(f"OCR - {result_msg.replace(chr(10), ', ')}"[:120])
 
-        except Exception as e:
-            messagebox.showerror("OCR Error", f"Failed to run OCR:\n{e}")
+        speculative = self._speculative.get(self.current_image_path)
+        if speculative is not None and not speculative.cancelled():
+            # Already being read as the next-row guess; wait for it rather than OCR twice
+            self.deliver_when_done(speculative, done)
+        else:
+            self.run_ocr_in_background(self.ocr_card, (self.current_image_path, img), done)
+
+    def ocr_card(self, image_path, img=None):
+        """OCR a card for Age/Gender, reusing the result if this image was read before.
+
+        img is the already-open image, if any; otherwise the file is opened on a cache miss.
+        Nothing is stored when neither field was found, so a failed run (no tesseract,
+        unreadable image) is retried next time instead of becoming a permanent miss.
+        """
+        digest = card_digest(image_path)
+        result = self._ocr_store.get_age_gender(digest)
+        if result is None:
+            result = ocr_age_gender(img if img is not None else Image.open(image_path))
+            if any(result):
+                self._ocr_store.put_age_gender(digest, result)
+        return result
 
     def apply_changes(self):
         """Apply changes to the current row."""
         if not self.missing_rows or self.current_index >= len(self.missing_rows):
             return
 
-        row_data = self.missing_rows[self.current_index]
-        row_num = row_data['row_num']
+        rows, i = self.missing_rows, self.current_index
+        row_num = int(rows.row_num[i])
 
         age_val = self.age_var.get().strip()
         gender_val = self.gender_var.get().strip()
@@ -742,39 +1433,47 @@ class MissingDataFinder:
                 messagebox.showerror("Error", "Age must be a number")
                 return
 
-        # Update worksheet (v4.0 format: Age is column 8, Gender is column 9)
-        self.worksheet.cell(row=row_num, column=8, value=age_val if age_val else None)
-        self.worksheet.cell(row=row_num, column=9, value=gender_val if gender_val else None)
-
-        # Remove yellow fill if data is now complete
-        if age_val:
-            self.worksheet.cell(row=row_num, column=8).fill = PatternFill()
-        if gender_val:
-            self.worksheet.cell(row=row_num, column=9).fill = PatternFill()
+        # Record for save_excel (the workbook is only opened for writing on save)
+        self.pending_changes[row_num] = (age_val, gender_val)
 
         # Update tracking
-        row_data['age'] = age_val
-        row_data['gender'] = gender_val
-        row_data['age_missing'] = not age_val
-        row_data['gender_missing'] = not gender_val
+        was_shown = rows.passes_filter(i, self.filter_var.get())
+        rows.age[i] = age_val
+        rows.gender[i] = gender_val
+        rows.age_missing[i] = not age_val
+        rows.gender_missing[i] = not gender_val
 
         self.changes_made = True
-        self.save_status_var.set("Unsaved changes")
+        self.set_var(self.save_status_var, "Unsaved changes")
 
         # Update display
-        self.age_status_var.set("" if age_val else "MISSING")
-        self.gender_status_var.set("" if gender_val else "MISSING")
+        self.set_var(self.age_status_var, "" if age_val else "MISSING")
+        self.set_var(self.gender_status_var, "" if gender_val else "MISSING")
 
-        # Refresh list
-        self.apply_filter()
+        # Refresh list: rebuild only if the row enters or leaves the filtered view
+        if was_shown == rows.passes_filter(i, self.filter_var.get()):
+            self.refresh_list_row(self.current_index)
+            self.update_progress()
+        else:
+            self.apply_filter()
 
-        # Re-select current item
-        self.highlight_current_in_list()
+        # Re-select current item (apply_and_next selects the next one instead)
+        if not self._suspend_redraw:
+            self.highlight_current_in_list()
 
     def apply_and_next(self):
-        """Apply changes and move to next row."""
-        self.apply_changes()
+        """Apply changes and move to next row, redrawing the window once."""
+        index = self.current_index
+        self._suspend_redraw = True
+        try:
+            self.apply_changes()
+        finally:
+            self._suspend_redraw = False
+
         self.next_row()
+        if self.current_index == index:
+            self.highlight_current_in_list()  # Already on the last row
+        self.root.update_idletasks()
 
     def prev_row(self):
         """Go to previous row."""
@@ -789,53 +1488,147 @@ class MissingDataFinder:
             self.current_index += 1
             self.display_current_row()
             self.highlight_current_in_list()
+            self.prefetch_next_ocr()
+
+    def prefetch_next_ocr(self):
+        """OCR the row after the current one while the user works on this one.
+
+        The result lands in the OCR Retry cache, so pressing OCR Retry there is
+        instant. At most two speculative runs are in flight, on their own threads.
+        """
+        next_index = self.current_index + 1
+        if not self.image_folder or next_index >= len(self.missing_rows):
+            return
+
+        self._speculative = {path: f for path, f in self._speculative.items() if not f.done()}
+        if len(self._speculative) >= 2:
+            return
+
+        source_folder = self.missing_rows.source_folder[next_index]
+        card_file = self.missing_rows.card_file[next_index]
+        if not source_folder or not card_file:
+            return
+        image_path = self.find_card_image(source_folder, card_file)
+        if not image_path or image_path in self._speculative:
+            return
+
+        self._speculative[image_path] = self._speculative_pool.submit(self.ocr_card, image_path)
 
     def highlight_current_in_list(self):
         """Highlight current row in listbox."""
         # Find position in filtered list
-        filter_type = self.filter_var.get()
-        list_index = 0
+        list_index = self._filtered_positions.get(self.current_index)
+        if list_index is None:
+            return  # Current row is hidden by the filter
 
-        for i, row_data in enumerate(self.missing_rows):
-            if filter_type == 'age' and not row_data['age_missing']:
-                continue
-            if filter_type == 'gender' and not row_data['gender_missing']:
-                continue
-
-            if i == self.current_index:
-                self.row_listbox.selection_clear(0, tk.END)
-                self.row_listbox.selection_set(list_index)
-                self.row_listbox.see(list_index)
-                break
-
-            list_index += 1
+        self.row_listbox.selection_clear(0, tk.END)
+        self.row_listbox.selection_set(list_index)
+        self.row_listbox.see(list_index)
 
     def save_excel(self):
         """Save changes to Excel file."""
-        if not self.workbook:
+        if not self.excel_path:
             messagebox.showwarning("Warning", "No Excel file loaded")
             return
 
         try:
-            # Create backup
+            # Create backup (only when this save will change the file)
             backup_path = self.excel_path.with_suffix('.xlsx.bak')
-            if self.excel_path.exists():
+            backed_up = bool(self.pending_changes) and self.excel_path.exists()
+            if backed_up:
                 import shutil
-                shutil.copy(self.excel_path, backup_path)
-
-            # Save
-            self.workbook.save(self.excel_path)
+                shutil.copyfile(self.excel_path, backup_path)
+
+            # Patch only the edited cells (v4.0 format: Age is column H, Gender is column I)
+            cells = {}
+            for row_num, (age_val, gender_val) in self.pending_changes.items():
+                cells[(row_num, 'H')] = age_val if age_val else None
+                cells[(row_num, 'I')] = gender_val if gender_val else None
+
+            if not patch_xlsx_cells(self.excel_path, cells):
+                if not messagebox.askyesno(
+                        "Save",
+                        "These cells can't be patched in place, so the whole workbook must be rewritten.\n\n"
+                        "Values and formulas are kept, but cell formatting is reset to the v4.0 export's "
+                        "(bold header, column widths, yellow fill on missing Age/Gender).\n\n"
+                        f"Rewrite it? The original is kept as {backup_path.name}."):
+                    self.save_status_var.set("Not saved - unsaved changes kept")
+                    return
+                self.save_streaming()
+            self.pending_changes = {}
 
             self.changes_made = False
-            self.save_status_var.set(f"Saved! Backup: {backup_path.name}")
+            self.save_status_var.set(f"Saved! Backup: {backup_path.name}" if backed_up else "Saved! (nothing changed)")
 
             # Count remaining missing
-            remaining = sum(1 for r in self.missing_rows if r['age_missing'] or r['gender_missing'])
+            remaining = len(self.missing_rows) - self.missing_rows.fixed_count()
             messagebox.showinfo("Saved", f"Excel saved successfully!\n\nRemaining missing: {remaining}")
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save:\n{e}")
 
+    def save_streaming(self):
+        """Rewrite the workbook row by row with xlsxwriter's constant-memory writer.
+
+        The source is read with openpyxl in read-only mode, so neither side
+        holds a sheet in memory. Every sheet's values and formulas are copied;
+        formatting is re-created the way the v4.0 export writes it (bold
+        header, column widths, yellow fill on missing Age/Gender), so any other
+        cell styling is lost.
+        """
+        # Write beside the original and swap in, so a failed save can't corrupt it
+        with tempfile.NamedTemporaryFile(dir=self.excel_path.parent, suffix='.xlsx', delete=False) as tmp:
+            tmp_path = tmp.name
+
+        source = load_workbook(self.excel_path, read_only=True)
+        try:
+            output = xlsxwriter.Workbook(tmp_path, {'constant_memory': True, 'strings_to_urls': False})
+            header_format = output.add_format(HEADER_FORMAT)
+            missing_format = output.add_format(MISSING_FORMAT)
+
+            for source_sheet in source.worksheets:
+                is_voter_sheet = source_sheet.title == source.active.title
+                sheet = output.add_worksheet(source_sheet.title)
+                if is_voter_sheet:
+                    for col, width in enumerate(COLUMN_WIDTHS):
+                        sheet.set_column(col, col, width)
+
+                for row_index, cells in enumerate(source_sheet.iter_rows()):
+                    row_num = row_index + 1
+                    row = [cell.value for cell in cells]
+                    formulas = {col for col, cell in enumerate(cells) if cell.data_type == 'f'}
+
+                    cell_format = header_format if is_voter_sheet and row_num == 1 else None
+                    if is_voter_sheet and row_num in self.pending_changes and len(row) >= 9:
+                        age_val, gender_val = self.pending_changes[row_num]
+                        row[7] = age_val if age_val else None
+                        row[8] = gender_val if gender_val else None
+                        formulas -= {7, 8}
+
+                    for col, value in enumerate(row):
+                        # v4.0 format: Age is column 8, Gender is column 9
+                        col_format = cell_format
+                        if is_voter_sheet and row_num > 1 and col in (7, 8) and is_missing(value):
+                            col_format = missing_format
+
+                        if col in formulas:
+                            sheet.write_formula(row_index, col, getattr(value, 'text', value), col_format)
+                        elif isinstance(value, str):
+                            sheet.write_string(row_index, col, value, col_format)  # Never as a formula/URL
+                        elif value is not None:
+                            sheet.write(row_index, col, value, col_format)
+                        elif col_format is not None:
+                            sheet.write_blank(row_index, col, None, col_format)
+
+            output.close()
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        finally:
+            source.close()
+
+        os.replace(tmp_path, self.excel_path)
+
     def on_closing(self):
         """Handle window close."""
         if self.changes_made:
@@ -50,6 +50,7 @@ except ImportError:
     import pytesseract
 
 TESSERACT_CONFIG = '--psm 6 --oem 1'
+NO_FILL = PatternFill()  # Shared style for clearing the yellow missing-data fill
 
 
 class MissingDataFinderCloud:
@@ -63,6 +64,7 @@ class MissingDataFinderCloud:
         self.excel_path = None
         self.workbook = None
         self.worksheet = None
+        self._pending = {}  # (row, column) -> (value, clear_fill), written to the worksheet on save
         self.image_folder = None
         self.missing_rows = []
         self.current_index = 0
@@ -326,6 +328,7 @@ class MissingDataFinderCloud:
             self.excel_path = Path(excel_path)
             self.workbook = load_workbook(self.excel_path)
             self.worksheet = self.workbook.active
+            self._pending = {}
 
             # Find missing rows
             self.find_missing_rows()
@@ -556,15 +559,10 @@ class MissingDataFinderCloud:
                 messagebox.showerror("Error", "Age must be a number")
                 return
 
-        # Update worksheet (Cloud Vision format: Age=9, Gender=10)
-        self.worksheet.cell(row=row_num, column=9, value=age_val if age_val else None)
-        self.worksheet.cell(row=row_num, column=10, value=gender_val if gender_val else None)
-
-        # Remove yellow fill if data is now complete
-        if age_val:
-            self.worksheet.cell(row=row_num, column=9).fill = PatternFill()
-        if gender_val:
-            self.worksheet.cell(row=row_num, column=10).fill = PatternFill()
+        # Queue the worksheet update (Cloud Vision format: Age=9, Gender=10);
+        # the yellow fill is removed on save if data is now complete
+        self._pending[(row_num, 9)] = (age_val if age_val else None, bool(age_val))
+        self._pending[(row_num, 10)] = (gender_val if gender_val else None, bool(gender_val))
 
         # Update tracking
         row_data['age'] = age_val
@@ -634,6 +632,8 @@ class MissingDataFinderCloud:
                 import shutil
                 shutil.copy(self.excel_path, backup_path)
 
+            self.flush_pending()
+
             # Save
             self.workbook.save(self.excel_path)
 
@@ -647,6 +647,15 @@ class MissingDataFinderCloud:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save:\n{e}")
 
+    def flush_pending(self):
+        """Write queued edits to the worksheet in row order, resolving each cell once."""
+        for (row_num, column), (value, clear_fill) in sorted(self._pending.items()):
+            cell = self.worksheet.cell(row=row_num, column=column)
+            cell.value = value
+            if clear_fill:
+                cell.fill = NO_FILL
+        self._pending = {}
+
     def on_closing(self):
         """Handle window close."""
         if self.changes_made:
@@ -13,11 +13,16 @@ Setup:
    - GOOGLE_PROJECT_ID
    - DOCAI_PROCESSOR_ID
    - DOCAI_LOCATION (us or eu)
+   - GCS_BUCKET (only for batch mode)
 """
 
 import asyncio
 import aiohttp
+import atexit
+import contextlib
 import base64
+import gzip
+import hashlib
 import json
 import re
 import os
@@ -25,17 +30,19 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from pathlib import Path
 import threading
+import queue
+import shutil
 import subprocess
 import time
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import webbrowser
 from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlencode, parse_qs, urlparse
+from urllib.parse import urlencode, parse_qs, urlparse, quote
 import secrets
 
 # Install packages
 def install_packages():
-    packages = ['pillow', 'openpyxl', 'aiohttp', 'python-dotenv']
+    packages = ['pillow', 'openpyxl', 'aiohttp', 'python-dotenv', 'pymupdf', 'numpy', 'orjson']
     for pkg in packages:
         try:
             if pkg == 'python-dotenv':
@@ -48,19 +55,52 @@ def install_packages():
 
 install_packages()
 
+import fitz  # PyMuPDF for PDF splitting
+import numpy as np
+import orjson
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, PatternFill
+from openpyxl.utils import get_column_letter
 from dotenv import load_dotenv
 
+# Patterns used on every card, compiled once
+PART_TAM_RE = re.compile(r'-TAM-(\d+)-WI', re.IGNORECASE)
+PART_RE = re.compile(r'-(\d+)-WI', re.IGNORECASE)
+BATCH_SHARD_RE = re.compile(r'-(\d+)\.json$')
+VOTER_ID_RE = re.compile(r'([A-Z]{2,3}\d{6,10})')
+VOTER_ID_WORD_RE = re.compile(r'\b([A-Z]{2,3}\d{6,10})\b')
+PHOTO_RE = re.compile(r'Photo\s*is\s*available', re.IGNORECASE)
+SERIAL_RE = re.compile(r'^\s*(\d{1,4})\s')
+NAME_RE = re.compile(r'பெயர்\s*[:\-–]?\s*([^\-\n]+?)(?=\s*[-–]|\s*கணவர்|\s*தந்தை|\s*தாய்|\s*வீட்|$)')
+# Tried in this order: Husband, Father, Mother. Kept as separate patterns: each starts with
+# a literal, which re scans for quickly; a single alternation has to try every position.
+RELATION_RES = [
+    ('Husband', re.compile(r'கணவர்\s*பெயர்\s*[:\-–]?\s*([^\-\n]+?)(?=\s*[-–]|\s*வீட்|$)')),
+    ('Father', re.compile(r'தந்தையின்\s*பெயர்\s*[:\-–]?\s*([^\-\n]+?)(?=\s*[-–]|\s*வீட்|$)')),
+    ('Mother', re.compile(r'தாயின்\s*பெயர்\s*[:\-–]?\s*([^\-\n]+?)(?=\s*[-–]|\s*வீட்|$)')),
+]
+HOUSE_LABEL_RE = re.compile(r'வீட்டு\s*எண்\s*[:\-–]?\s*(\d+[-/]?\d*[A-Za-z]?)')
+AGE_LABEL_RE = re.compile(r'வயது\s*[:\-–]?\s*(\d{1,3})')
+NAME_LABEL_TAIL_RE = re.compile(r'\s*பெயர்.*$')
+TRAILING_PUNCT_RE = re.compile(r'\s*[:\-–]\s*$')
+HOUSE_NO_RE = re.compile(r'(\d+[-/]?\d*[A-Za-z]?)')
+NUMBER_RE = re.compile(r'(\d{1,3})')
+
+# Excel styles, shared by every cell that uses them
+HEADER_FONT = Font(bold=True)
+HEADER_ALIGNMENT = Alignment(horizontal='center')
+MISSING_FILL = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')  # Yellow
+
 
 def extract_part_number(filename):
     """Extract part number from filename."""
     if not filename:
         return ''
-    match = re.search(r'-TAM-(\d+)-WI', filename, re.IGNORECASE)
+    match = PART_TAM_RE.search(filename)
     if match:
         return match.group(1)
-    match = re.search(r'-(\d+)-WI', filename, re.IGNORECASE)
+    match = PART_RE.search(filename)
     if match:
         return match.group(1)
     return ''
@@ -82,6 +122,7 @@ class OAuthManager:
         self.refresh_token = None
         self.token_expiry = 0
         self.token_file = Path.home() / '.google_docai_oauth_token.json'
+        self._refresh_lock = threading.Lock()  # One refresh at a time when many requests find the token expired
         self.load_saved_token()
 
     def load_saved_token(self):
@@ -110,6 +151,14 @@ class OAuthManager:
     def get_valid_token(self):
         if self.access_token and time.time() < self.token_expiry - 60:
             return self.access_token
+
+        with self._refresh_lock:
+            # Another request may have refreshed while we waited
+            if self.access_token and time.time() < self.token_expiry - 60:
+                return self.access_token
+            return self._renew_token()
+
+    def _renew_token(self):
         if self.refresh_token:
             if self.refresh_access_token():
                 return self.access_token
@@ -218,10 +267,85 @@ class OAuthManager:
             return False
 
 
-def process_pdf_with_docai(pdf_content_b64, oauth_manager, project_id, location, processor_id, log_func=None):
-    """Send PDF to Document AI and get results."""
+DOCAI_CONCURRENCY = 8  # Document AI requests in flight at once
+DOCAI_TIMEOUT = 300  # Seconds per request
+DOCAI_PAGE_LIMIT = 15  # Pages per online :process request; longer PDFs are split
+DOCAI_SIZE_LIMIT = 20 * 1024 * 1024  # Bytes per online :process request; larger parts are split further
+# Only the parts of the Document the parsers read (skips page images, tokens, lines, styles).
+# Set DOCAI_FULL_RESPONSE=1 to fetch everything when troubleshooting.
+DOCAI_FIELD_MASK = 'text,entities,pages.tables,pages.blocks'
+DOCAI_CACHE_DIR = Path.home() / '.docai_cache'  # Responses by PDF content, so re-runs aren't re-billed
+BATCH_DOCUMENT_LIMIT = 50  # PDFs per :batchProcess call
+BATCH_POLL_INTERVAL = 5  # Seconds between batch operation status checks
+
+
+def split_pdf(pdf_content, max_pages=DOCAI_PAGE_LIMIT, max_bytes=DOCAI_SIZE_LIMIT):
+    """Split PDF bytes into page-range parts of at most max_pages pages each.
+
+    A part over max_bytes is halved until it fits (or is down to a single page).
+    Parts are serialized without a fresh trailer /ID, so splitting the same PDF
+    again gives the same bytes and the same Document AI cache keys.
+    """
+    with fitz.open(stream=pdf_content, filetype='pdf') as doc:
+        if len(doc) <= max_pages and len(pdf_content) <= max_bytes:
+            return [pdf_content]
+
+        def split_range(start, stop):
+            with fitz.open() as part:
+                part.insert_pdf(doc, from_page=start, to_page=stop - 1)
+                part_content = part.tobytes(no_new_id=True)
+            if len(part_content) > max_bytes and stop - start > 1:
+                middle = (start + stop) // 2
+                return split_range(start, middle) + split_range(middle, stop)
+            return [part_content]
+
+        parts = []
+        for start in range(0, len(doc), max_pages):
+            parts += split_range(start, min(start + max_pages, len(doc)))
+        return parts
+
+
+def docai_cache_path(pdf_content_b64, project_id, location, processor_id, field_mask):
+    """Cache file for a PDF's response from a given processor and field mask."""
+    digest = hashlib.sha256(f"{project_id}/{location}/{processor_id}/{field_mask}\n".encode())
+    digest.update(pdf_content_b64)
+    key = digest.hexdigest()
+    return DOCAI_CACHE_DIR / key[:2] / f"{key}.json.gz"
+
+
+def load_cached_document(cache_path):
+    """Return the cached document, or None if there is none (or it can't be read)."""
+    try:
+        return orjson.loads(gzip.decompress(cache_path.read_bytes()))
+    except (OSError, ValueError, EOFError):
+        return None
+
+
+def save_cached_document(cache_path, document):
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix('.tmp')
+        tmp_path.write_bytes(gzip.compress(orjson.dumps(document), compresslevel=5))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # The cache is only an optimization
+
+
+async def process_pdf_with_docai_async(session, pdf_content_b64, oauth_manager, project_id, location, processor_id, log_func=None):
+    """Send one PDF (base64-encoded bytes) to Document AI over a shared aiohttp session and get results.
 
-    token = oauth_manager.get_valid_token()
+    Responses are cached on disk by PDF content, so the same PDF is only billed once.
+    """
+    field_mask = '' if os.getenv('DOCAI_FULL_RESPONSE') else DOCAI_FIELD_MASK
+    cache_path = docai_cache_path(pdf_content_b64, project_id, location, processor_id, field_mask)
+    document = await asyncio.to_thread(load_cached_document, cache_path)
+    if document is not None:
+        if log_func:
+            log_func("Using cached Document AI response")
+        return document
+
+    # The token may need a (blocking) refresh; keep it off the event loop
+    token = await asyncio.to_thread(oauth_manager.get_valid_token)
     if not token:
         if log_func:
             log_func("Failed to get valid OAuth token")
@@ -234,40 +358,226 @@ def process_pdf_with_docai(pdf_content_b64, oauth_manager, project_id, location,
         'Content-Type': 'application/json'
     }
 
-    payload = {
-        "rawDocument": {
-            "content": pdf_content_b64,
-            "mimeType": "application/pdf"
-        }
-    }
+    # Built as bytes around the base64 content: it needs no JSON escaping, so this skips
+    # json.dumps scanning and copying megabytes of it, and the str -> bytes encode after
+    payload = b'{"rawDocument": {"mimeType": "application/pdf", "content": "' + pdf_content_b64 + b'"}'
+    if field_mask:
+        payload += b', "fieldMask": ' + json.dumps(field_mask).encode('utf-8')
+    payload += b'}'
 
     try:
-        import urllib.request
-        req = urllib.request.Request(
-            url,
-            data=json.dumps(payload).encode('utf-8'),
-            headers=headers,
-            method='POST'
-        )
-
         if log_func:
             log_func("Sending PDF to Document AI...")
 
-        with urllib.request.urlopen(req, timeout=300) as response:
-            result = json.loads(response.read().decode())
-            return result.get('document', {})
+        async with session.post(url, data=payload, headers=headers,
+                                timeout=aiohttp.ClientTimeout(total=DOCAI_TIMEOUT)) as response:
+            if response.status != 200:
+                error_body = await response.text()
+                if log_func:
+                    log_func(f"API Error {response.status}: {error_body[:500]}")
+                return None
+
+            # orjson parses the raw bytes, skipping aiohttp's decode to a second full-size str
+            document = orjson.loads(await response.read()).get('document', {})
+
+        await asyncio.to_thread(save_cached_document, cache_path, document)
+        return document
 
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode() if e.fp else ''
-        if log_func:
-            log_func(f"API Error {e.code}: {error_body[:500]}")
-        return None
     except Exception as e:
         if log_func:
-            log_func(f"Request error: {e}")
+            log_func(f"Request error: {e!r}")
         return None
 
 
+def docai_session():
+    """A keep-alive HTTP session for Document AI and GCS requests."""
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=16, keepalive_timeout=60, ttl_dns_cache=300))
+
+
+async def docai_pipeline(pdf_content, pdf_name, oauth_manager, project_id, location, processor_id, log_func=None,
+                         parse_pool=None, session=None):
+    """Split, send and parse a PDF as a pipeline of queues.
+
+    A producer splits the PDF and base64-encodes each part, DOCAI_CONCURRENCY consumers
+    send parts to Document AI, and a parser turns each document into cards as soon as it
+    arrives, so encoding, network waits and parsing overlap. With several parts, parsing
+    runs in parse_pool (a ProcessPoolExecutor) so parts are parsed on all cores.
+    Uses session if given (keeping its connections warm), else a session of its own.
+    Returns the cards of each part in page order (None for a part that failed).
+    """
+    part_queue = asyncio.Queue(maxsize=DOCAI_CONCURRENCY)
+    document_queue = asyncio.Queue(maxsize=DOCAI_CONCURRENCY)
+    part_cards = {}
+    part_count = 0
+
+    async def produce():
+        nonlocal part_count
+        parts = await asyncio.to_thread(split_pdf, pdf_content)
+        part_count = len(parts)
+        if len(parts) > 1 and log_func:
+            log_func(f"Split into {len(parts)} parts of up to {DOCAI_PAGE_LIMIT} pages / {DOCAI_SIZE_LIMIT // (1024 * 1024)} MB")
+        for index, part in enumerate(parts):
+            part_b64 = await asyncio.to_thread(base64.b64encode, part)
+            await part_queue.put((index, part_b64))
+        for _ in range(DOCAI_CONCURRENCY):
+            await part_queue.put(None)
+
+    async def consume(session):
+        while (item := await part_queue.get()) is not None:
+            index, part_b64 = item
+            document = await process_pdf_with_docai_async(
+                session, part_b64, oauth_manager, project_id, location, processor_id, log_func)
+            await document_queue.put((index, document))
+
+    async def parse():
+        loop = asyncio.get_running_loop()
+        parsing = {}
+        while (item := await document_queue.get()) is not None:
+            index, document = item
+            if not document:
+                part_cards[index] = None
+            elif parse_pool and part_count > 1:
+                parsing[index] = loop.run_in_executor(parse_pool, parse_document_response, document, pdf_name)
+            else:
+                parsing[index] = asyncio.ensure_future(asyncio.to_thread(parse_document_response, document, pdf_name))
+        for index, future in parsing.items():
+            part_cards[index] = await future
+
+    async with contextlib.AsyncExitStack() as stack:
+        if session is None:
+            session = await stack.enter_async_context(docai_session())
+        parser = asyncio.create_task(parse())
+        consumers = [asyncio.create_task(consume(session)) for _ in range(DOCAI_CONCURRENCY)]
+        try:
+            await produce()
+            await asyncio.gather(*consumers)
+            await document_queue.put(None)
+            await parser
+        finally:
+            # If splitting failed, the tasks would wait on their queues for the life of the loop
+            for task in (parser, *consumers):
+                task.cancel()
+            await asyncio.gather(parser, *consumers, return_exceptions=True)
+
+    return [part_cards[index] for index in sorted(part_cards)]
+
+
+async def upload_pdf_to_gcs(session, pdf_path, bucket, blob_name, token):
+    """Upload a PDF to GCS."""
+    url = f"https://storage.googleapis.com/upload/storage/v1/b/{bucket}/o?uploadType=media&name={quote(blob_name, safe='')}"
+    headers = {
+        'Authorization': f'Bearer {token}',
+        'Content-Type': 'application/pdf'
+    }
+    data = await asyncio.to_thread(Path(pdf_path).read_bytes)
+
+    async with session.post(url, data=data, headers=headers,
+                            timeout=aiohttp.ClientTimeout(total=DOCAI_TIMEOUT)) as response:
+        response.raise_for_status()
+
+
+async def read_batch_documents(session, gcs_uri, token):
+    """Download the Document JSON files a batch job wrote under gcs_uri, in page order."""
+    bucket, _, prefix = gcs_uri.removeprefix('gs://').partition('/')
+    headers = {'Authorization': f'Bearer {token}'}
+
+    names = []
+    params = {'prefix': prefix}
+    while True:
+        async with session.get(f"https://storage.googleapis.com/storage/v1/b/{bucket}/o",
+                               params=params, headers=headers) as response:
+            response.raise_for_status()
+            result = await response.json()
+        names.extend(item['name'] for item in result.get('items', []) if item['name'].endswith('.json'))
+        if not result.get('nextPageToken'):
+            break
+        params['pageToken'] = result['nextPageToken']
+
+    # Large PDFs are split into shards named <name>-0.json, <name>-1.json, ...
+    names.sort(key=lambda n: int(m.group(1)) if (m := BATCH_SHARD_RE.search(n)) else 0)
+
+    async def download(name):
+        url = f"https://storage.googleapis.com/storage/v1/b/{bucket}/o/{quote(name, safe='')}?alt=media"
+        async with session.get(url, headers=headers) as response:
+            response.raise_for_status()
+            return orjson.loads(await response.read())
+
+    return await asyncio.gather(*(download(name) for name in names))
+
+
+async def batch_process_pdfs(pdf_paths, gcs_bucket, oauth_manager, project_id, location, processor_id, log_func=None,
+                             session=None):
+    """Process PDFs with Document AI batch mode ($0.01/page, no page limit).
+
+    Uploads the PDFs to gs://{gcs_bucket}/pdf_batch_<time>/, runs :batchProcess on them
+    BATCH_DOCUMENT_LIMIT at a time and returns {pdf_path: [document, ...]}.
+    A PDF whose processing failed maps to an empty list. Uses session if given.
+    """
+    log = log_func or (lambda msg: None)
+    job_prefix = f"pdf_batch_{int(time.time())}"
+    url = f"https://{location}-documentai.googleapis.com/v1/projects/{project_id}/locations/{location}/processors/{processor_id}:batchProcess"
+    documents = {pdf_path: [] for pdf_path in pdf_paths}
+
+    async with contextlib.AsyncExitStack() as stack:
+        if session is None:
+            session = await stack.enter_async_context(docai_session())
+        token = await asyncio.to_thread(oauth_manager.get_valid_token)
+        if not token:
+            log("Failed to get valid OAuth token")
+            return documents
+
+        # Upload (index prefix keeps same-named PDFs from different folders apart)
+        inputs = {f"gs://{gcs_bucket}/{job_prefix}/input/{i}_{Path(p).name}": p for i, p in enumerate(pdf_paths)}
+        log(f"Uploading {len(inputs)} PDF(s) to gs://{gcs_bucket}/{job_prefix}/input/")
+        await asyncio.gather(*(upload_pdf_to_gcs(session, pdf_path, gcs_bucket, uri.split('/', 3)[3], token)
+                               for uri, pdf_path in inputs.items()))
+
+        uris = list(inputs)
+        for start in range(0, len(uris), BATCH_DOCUMENT_LIMIT):
+            payload = {
+                "inputDocuments": {
+                    "gcsDocuments": {
+                        "documents": [{"gcsUri": uri, "mimeType": "application/pdf"}
+                                      for uri in uris[start:start + BATCH_DOCUMENT_LIMIT]]
+                    }
+                },
+                "documentOutputConfig": {
+                    "gcsOutputConfig": {
+                        "gcsUri": f"gs://{gcs_bucket}/{job_prefix}/output/{start}/"
+                    }
+                }
+            }
+
+            async with session.post(url, json=payload, headers={'Authorization': f'Bearer {token}'}) as response:
+                response.raise_for_status()
+                operation_name = (await response.json())['name']
+            log(f"Batch job started: {operation_name.split('/')[-1]}")
+
+            while True:
+                await asyncio.sleep(BATCH_POLL_INTERVAL)
+                token = await asyncio.to_thread(oauth_manager.get_valid_token)
+                async with session.get(f"https://{location}-documentai.googleapis.com/v1/{operation_name}",
+                                       headers={'Authorization': f'Bearer {token}'}) as response:
+                    response.raise_for_status()
+                    status = await response.json()
+                if status.get('done'):
+                    break
+
+            if status.get('error'):
+                raise RuntimeError(f"Batch failed: {status['error'].get('message', 'Unknown error')}")
+
+            for item in status.get('metadata', {}).get('individualProcessStatuses', []):
+                pdf_path = inputs.get(item.get('inputGcsSource'))
+                if pdf_path is None:
+                    continue
+                if not item.get('outputGcsDestination'):
+                    log(f"Batch error for {Path(pdf_path).name}: {item.get('status', {}).get('message', 'no output')}")
+                    continue
+                documents[pdf_path] = await read_batch_documents(session, item['outputGcsDestination'], token)
+
+    return documents
+
+
 def parse_document_response(document, pdf_name):
     """Parse Document AI response to extract voter cards.
 
@@ -336,18 +646,7 @@ def parse_custom_entities(entities, document, pdf_name, part_no):
 
 def extract_card_from_entity(entity, full_text, pdf_name, part_no):
     """Extract card data from a card-level entity."""
-    card = {
-        'serial_no': '',
-        'voter_id': '',
-        'name': '',
-        'relation_type': '',
-        'relation_name': '',
-        'house_no': '',
-        'age': '',
-        'gender': '',
-        'folder_name': pdf_name,
-        'part_no': part_no
-    }
+    card = new_card(pdf_name, part_no)
 
     # Get the text for this entity
     mention_text = entity.get('mentionText', '')
@@ -395,11 +694,11 @@ def group_entities_to_cards(entities, document, pdf_name, part_no):
     cards = []
     full_text = document.get('text', '')
 
-    # Sort entities by page and Y position
-    sorted_entities = sorted(entities, key=lambda e: (
-        get_entity_page(e),
-        get_entity_y(e)
-    ))
+    # Sort entities by page and Y position (each position is read once)
+    positions = [entity_position(e) for e in entities]
+    pages = np.fromiter((page for page, _ in positions), dtype=np.int64, count=len(positions))
+    ys = np.fromiter((y for _, y in positions), dtype=np.float64, count=len(positions))
+    order = np.lexsort((ys, pages))
 
     # Group entities that are close together (same card)
     current_card = new_card(pdf_name, part_no)
@@ -407,9 +706,7 @@ def group_entities_to_cards(entities, document, pdf_name, part_no):
     current_page = -1
     y_threshold = 0.08  # ~8% of page height
 
-    for entity in sorted_entities:
-        entity_y = get_entity_y(entity)
-        entity_page = get_entity_page(entity)
+    for entity, entity_page, entity_y in zip([entities[i] for i in order], pages[order].tolist(), ys[order].tolist()):
 
         # New page or significant Y jump = new card
         if entity_page != current_page or (current_y >= 0 and abs(entity_y - current_y) > y_threshold):
@@ -435,69 +732,113 @@ def group_entities_to_cards(entities, document, pdf_name, part_no):
     return cards
 
 
-def get_entity_page(entity):
-    """Get page number from entity."""
-    page_anchor = entity.get('pageAnchor', {})
-    page_refs = page_anchor.get('pageRefs', [{}])
-    return int(page_refs[0].get('page', 0)) if page_refs else 0
+def entity_position(entity):
+    """(page, y) of an entity's first page reference; 0 for whatever is missing."""
+    try:
+        page_ref = entity['pageAnchor']['pageRefs'][0]
+    except (KeyError, IndexError):
+        return 0, 0
+    try:
+        y = page_ref['boundingPoly']['normalizedVertices'][0].get('y', 0)
+    except (KeyError, IndexError):
+        y = 0
+    return int(page_ref.get('page', 0)), y
 
 
-def get_entity_y(entity):
-    """Get Y position from entity bounding box."""
-    page_anchor = entity.get('pageAnchor', {})
-    page_refs = page_anchor.get('pageRefs', [{}])
-    if page_refs:
-        bounding_poly = page_refs[0].get('boundingPoly', {})
-        vertices = bounding_poly.get('normalizedVertices', [{}])
-        if vertices:
-            return vertices[0].get('y', 0)
-    return 0
+def block_position(block):
+    """(y, x) of a layout block's first vertex, or None if it has no bounding box."""
+    try:
+        vertex = block['layout']['boundingPoly']['normalizedVertices'][0]
+    except (KeyError, IndexError):
+        return None
+    return vertex.get('y', 0), vertex.get('x', 0)
+
+
+EMPTY_CARD = dict.fromkeys(
+    ['serial_no', 'voter_id', 'name', 'relation_type', 'relation_name', 'house_no', 'age', 'gender'], '')
 
 
 def new_card(pdf_name, part_no):
     """Create a new empty card."""
-    return {
-        'serial_no': '',
-        'voter_id': '',
-        'name': '',
-        'relation_type': '',
-        'relation_name': '',
-        'house_no': '',
-        'age': '',
-        'gender': '',
-        'folder_name': pdf_name,
-        'part_no': part_no
-    }
+    return {**EMPTY_CARD, 'folder_name': pdf_name, 'part_no': part_no}
 
 
-def apply_entity_to_card(card, entity_type, text):
-    """Apply an entity to the appropriate card field."""
-    if not text:
-        return
+def set_name(card, text):
+    if not card['name']:
+        card['name'] = clean_name(text)
+
+
+def set_voter_id(card, text):
+    card['voter_id'] = text.upper()
+
+
+def set_serial_no(card, text):
+    if not card['serial_no']:
+        card['serial_no'] = text
+
+
+def set_relation(relation_type):
+    def apply(card, text):
+        card['relation_type'] = relation_type
+        card['relation_name'] = clean_name(text)
+    return apply
+
+
+def set_house_no(card, text):
+    card['house_no'] = extract_house_no(text)
+
+
+def set_age(card, text):
+    card['age'] = extract_age(text)
+
+
+def set_gender(card, text):
+    card['gender'] = extract_gender(text)
+
+
+ENTITY_HANDLERS = {}  # Entity type -> setter (None = ignored), filled the first time each type is seen
+
+
+def entity_handler(entity_type):
+    """Return the card setter for an entity type, matching on the type name once per type."""
+    try:
+        return ENTITY_HANDLERS[entity_type]
+    except KeyError:
+        pass
 
     if 'name' in entity_type and 'relation' not in entity_type and 'father' not in entity_type:
-        if not card['name']:
-            card['name'] = clean_name(text)
+        handler = set_name
     elif 'voter' in entity_type or 'epic' in entity_type or entity_type == 'id':
-        card['voter_id'] = text.upper()
+        handler = set_voter_id
     elif 'serial' in entity_type or entity_type == 'number':
-        if not card['serial_no']:
-            card['serial_no'] = text
+        handler = set_serial_no
     elif 'father' in entity_type:
-        card['relation_type'] = 'Father'
-        card['relation_name'] = clean_name(text)
+        handler = set_relation('Father')
     elif 'husband' in entity_type:
-        card['relation_type'] = 'Husband'
-        card['relation_name'] = clean_name(text)
+        handler = set_relation('Husband')
     elif 'mother' in entity_type:
-        card['relation_type'] = 'Mother'
-        card['relation_name'] = clean_name(text)
+        handler = set_relation('Mother')
     elif 'house' in entity_type or 'address' in entity_type:
-        card['house_no'] = extract_house_no(text)
+        handler = set_house_no
     elif 'age' in entity_type:
-        card['age'] = extract_age(text)
+        handler = set_age
     elif 'gender' in entity_type or 'sex' in entity_type:
-        card['gender'] = extract_gender(text)
+        handler = set_gender
+    else:
+        handler = None
+
+    ENTITY_HANDLERS[entity_type] = handler
+    return handler
+
+
+def apply_entity_to_card(card, entity_type, text):
+    """Apply an entity to the appropriate card field."""
+    if not text:
+        return
+
+    handler = entity_handler(entity_type)
+    if handler:
+        handler(card, text)
 
 
 def parse_page(page, full_text, pdf_name, part_no, page_num):
@@ -541,24 +882,16 @@ def parse_blocks(blocks, full_text, pdf_name, part_no):
     """Parse text blocks to extract cards."""
     cards = []
 
-    # Group blocks by Y position
-    sorted_blocks = sorted(blocks, key=lambda b: (
-        b.get('layout', {}).get('boundingPoly', {}).get('normalizedVertices', [{}])[0].get('y', 0),
-        b.get('layout', {}).get('boundingPoly', {}).get('normalizedVertices', [{}])[0].get('x', 0)
-    ))
+    # Group blocks by Y position (blocks without a bounding box are skipped)
+    positioned = [(position, block) for block in blocks if (position := block_position(block))]
+    positioned.sort(key=lambda item: item[0])
 
     current_text = []
     current_y = -1
     y_threshold = 0.08
 
-    for block in sorted_blocks:
-        layout = block.get('layout', {})
-        vertices = layout.get('boundingPoly', {}).get('normalizedVertices', [])
-        if not vertices:
-            continue
-
-        block_y = vertices[0].get('y', 0)
-        block_text = get_text_from_layout(layout, full_text)
+    for (block_y, _), block in positioned:
+        block_text = get_text_from_layout(block['layout'], full_text)
 
         if current_y < 0:
             current_y = block_y
@@ -568,8 +901,7 @@ def parse_blocks(blocks, full_text, pdf_name, part_no):
             if current_text:
                 combined = ' '.join(current_text)
                 # Split by voter ID pattern
-                parts = re.split(r'(?=[A-Z]{2,3}\d{6,10})', combined)
-                for part in parts:
+                for part in split_at_voter_ids(combined):
                     if part.strip():
                         card = parse_card_text(part, pdf_name, part_no)
                         if card.get('name') or card.get('voter_id'):
@@ -582,8 +914,7 @@ def parse_blocks(blocks, full_text, pdf_name, part_no):
     # Process remaining
     if current_text:
         combined = ' '.join(current_text)
-        parts = re.split(r'(?=[A-Z]{2,3}\d{6,10})', combined)
-        for part in parts:
+        for part in split_at_voter_ids(combined):
             if part.strip():
                 card = parse_card_text(part, pdf_name, part_no)
                 if card.get('name') or card.get('voter_id'):
@@ -592,6 +923,16 @@ def parse_blocks(blocks, full_text, pdf_name, part_no):
     return cards
 
 
+def split_at_voter_ids(text):
+    """Yield the pieces of text starting at each voter ID (and any text before the first)."""
+    start = 0
+    for match in VOTER_ID_RE.finditer(text):
+        if match.start() > start:
+            yield text[start:match.start()]
+            start = match.start()
+    yield text[start:]
+
+
 def get_text_from_layout(layout, full_text):
     """Extract text using text anchors."""
     text_anchor = layout.get('textAnchor', {})
@@ -614,94 +955,67 @@ def parse_full_text(full_text, pdf_name, part_no):
     if not full_text:
         return cards
 
-    # Split by voter ID pattern
-    voter_id_pattern = r'([A-Z]{2,3}\d{6,10})'
-    parts = re.split(voter_id_pattern, full_text)
-
-    i = 0
-    while i < len(parts):
-        card_text = parts[i]
-        voter_id = ''
-
-        if i + 1 < len(parts) and re.match(voter_id_pattern, parts[i + 1]):
-            voter_id = parts[i + 1]
-            i += 2
-        else:
-            i += 1
-
-        if card_text.strip() or voter_id:
-            card = parse_card_text(card_text + ' ' + voter_id, pdf_name, part_no)
-            card['voter_id'] = voter_id
-            if card.get('name') or voter_id:
-                cards.append(card)
+    # Each card's text runs up to its voter ID
+    start = 0
+    for match in VOTER_ID_RE.finditer(full_text):
+        voter_id = match.group(1)
+        card = parse_card_text(full_text[start:match.start()] + ' ' + voter_id, pdf_name, part_no)
+        card['voter_id'] = voter_id
+        cards.append(card)
+        start = match.end()
+
+    # Text after the last voter ID
+    card_text = full_text[start:]
+    if card_text.strip():
+        card = parse_card_text(card_text + ' ', pdf_name, part_no)
+        if card.get('name'):
+            card['voter_id'] = ''
+            cards.append(card)
 
     return cards
 
 
 def parse_card_text(text, pdf_name, part_no):
     """Parse text from a single voter card using Tamil patterns."""
-    card = {
-        'serial_no': '',
-        'voter_id': '',
-        'name': '',
-        'relation_type': '',
-        'relation_name': '',
-        'house_no': '',
-        'age': '',
-        'gender': '',
-        'folder_name': pdf_name,
-        'part_no': part_no
-    }
+    card = new_card(pdf_name, part_no)
 
     if not text:
         return card
 
     # Clean text
-    text = re.sub(r'Photo\s*is\s*available', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = ' '.join(PHOTO_RE.sub('', text).split())
 
     # Voter ID
-    voter_match = re.search(r'\b([A-Z]{2,3}\d{6,10})\b', text)
+    voter_match = VOTER_ID_WORD_RE.search(text)
     if voter_match:
         card['voter_id'] = voter_match.group(1)
 
     # Serial Number
-    serial_match = re.search(r'^\s*(\d{1,4})\s', text)
+    serial_match = SERIAL_RE.search(text)
     if serial_match:
         card['serial_no'] = serial_match.group(1)
 
     # Name (பெயர்)
-    name_match = re.search(r'பெயர்\s*[:\-–]?\s*([^\-\n]+?)(?=\s*[-–]|\s*கணவர்|\s*தந்தை|\s*தாய்|\s*வீட்|$)', text)
+    name_match = NAME_RE.search(text)
     if name_match:
         card['name'] = clean_name(name_match.group(1))
 
-    # Husband (கணவர் பெயர்)
-    husband_match = re.search(r'கணவர்\s*பெயர்\s*[:\-–]?\s*([^\-\n]+?)(?=\s*[-–]|\s*வீட்|$)', text)
-    if husband_match:
-        card['relation_type'] = 'Husband'
-        card['relation_name'] = clean_name(husband_match.group(1))
-
-    # Father (தந்தையின் பெயர்)
-    if not card['relation_name']:
-        father_match = re.search(r'தந்தையின்\s*பெயர்\s*[:\-–]?\s*([^\-\n]+?)(?=\s*[-–]|\s*வீட்|$)', text)
-        if father_match:
-            card['relation_type'] = 'Father'
-            card['relation_name'] = clean_name(father_match.group(1))
-
-    # Mother (தாயின் பெயர்)
-    if not card['relation_name']:
-        mother_match = re.search(r'தாயின்\s*பெயர்\s*[:\-–]?\s*([^\-\n]+?)(?=\s*[-–]|\s*வீட்|$)', text)
-        if mother_match:
-            card['relation_type'] = 'Mother'
-            card['relation_name'] = clean_name(mother_match.group(1))
+    # Husband (கணவர் பெயர்), else Father (தந்தையின் பெயர்), else Mother (தாயின் பெயர்)
+    for relation_type, relation_re in RELATION_RES:
+        relation_match = relation_re.search(text)
+        if relation_match:
+            card['relation_type'] = relation_type
+            card['relation_name'] = clean_name(relation_match.group(1))
+            if card['relation_name']:
+                break
 
     # House Number (வீட்டு எண்)
-    house_match = re.search(r'வீட்டு\s*எண்\s*[:\-–]?\s*(\d+[-/]?\d*[A-Za-z]?)', text)
+    house_match = HOUSE_LABEL_RE.search(text)
     if house_match:
         card['house_no'] = house_match.group(1).strip()
 
     # Age (வயது)
-    age_match = re.search(r'வயது\s*[:\-–]?\s*(\d{1,3})', text)
+    age_match = AGE_LABEL_RE.search(text)
     if age_match:
         age = int(age_match.group(1))
         if 18 <= age <= 120:
@@ -717,17 +1031,19 @@ def clean_name(name):
     """Clean extracted name."""
     if not name:
         return ''
-    name = re.sub(r'\s*பெயர்.*$', '', name)
-    name = re.sub(r'\s*[:\-–]\s*$', '', name)
-    name = re.sub(r'\s+', ' ', name)
-    return name.strip()
+    # The regexes only run when there is something for them to remove
+    if 'பெயர்' in name:
+        name = NAME_LABEL_TAIL_RE.sub('', name)
+    if name.rstrip().endswith((':', '-', '–')):
+        name = TRAILING_PUNCT_RE.sub('', name)
+    return ' '.join(name.split())
 
 
 def extract_house_no(text):
     """Extract house number from text."""
     if not text:
         return ''
-    match = re.search(r'(\d+[-/]?\d*[A-Za-z]?)', text)
+    match = HOUSE_NO_RE.search(text)
     return match.group(1) if match else text.strip()
 
 
@@ -735,7 +1051,7 @@ def extract_age(text):
     """Extract age from text."""
     if not text:
         return ''
-    match = re.search(r'(\d{1,3})', text)
+    match = NUMBER_RE.search(text)
     if match:
         age = int(match.group(1))
         if 18 <= age <= 120:
@@ -747,13 +1063,21 @@ def extract_gender(text):
     """Extract gender from text."""
     if not text:
         return ''
-    if 'பெண்' in text or 'பெண' in text or 'female' in text.lower():
+    # 'பெண' / 'ஆண' also cover 'பெண்' / 'ஆண்'; lower() only runs when the Tamil check misses
+    if 'பெண' in text:
         return 'Female'
-    elif 'ஆண்' in text or 'ஆண' in text or 'male' in text.lower():
+    text_lower = text.lower()
+    if 'female' in text_lower:
+        return 'Female'
+    elif 'ஆண' in text or 'male' in text_lower:
         return 'Male'
     return ''
 
 
+UI_POLL_MS = 100  # How often UI updates queued by worker threads are applied
+LOG_MAX_LINES = 1000  # Older log lines are dropped; the Text widget slows down as it grows
+
+
 class PDFVoterCounter:
     def __init__(self, root):
         self.root = root
@@ -762,6 +1086,14 @@ class PDFVoterCounter:
         self.root.resizable(True, True)
 
         self.oauth_manager = None
+        self.parse_pool = ProcessPoolExecutor()  # Parses multi-part responses in parallel; workers start on first use
+
+        # Document AI I/O runs on one long-lived event loop, so the HTTP session and its
+        # open TLS connections carry over from one run to the next
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        self.session = None
+        atexit.register(self.close_session)
 
         # Load environment variables
         env_file = Path(__file__).parent / '.env'
@@ -772,20 +1104,27 @@ class PDFVoterCounter:
             self.project_id = os.getenv('GOOGLE_PROJECT_ID', '')
             self.processor_id = os.getenv('DOCAI_PROCESSOR_ID', '')
             self.location = os.getenv('DOCAI_LOCATION', 'us')
+            self.gcs_bucket = os.getenv('GCS_BUCKET', '')
         else:
             self.client_id = ''
             self.client_secret = ''
             self.project_id = ''
             self.processor_id = ''
             self.location = 'us'
+            self.gcs_bucket = ''
 
         self.style = ttk.Style()
         self.style.configure('Title.TLabel', font=('Helvetica', 16, 'bold'))
         self.style.configure('Header.TLabel', font=('Helvetica', 12, 'bold'))
         self.style.configure('Big.TLabel', font=('Helvetica', 24, 'bold'))
 
+        # Worker threads queue their UI updates here instead of posting one Tk event each
+        self.ui_queue = queue.Queue()
+        self.page_counts = {}  # (path, mtime) -> page count, so re-picking a PDF doesn't reopen it
+
         self.create_widgets()
         self.check_credentials()
+        self.root.after(UI_POLL_MS, self.drain_ui_queue)
 
     def create_widgets(self):
         main_frame = ttk.Frame(self.root, padding="20")
@@ -867,8 +1206,13 @@ class PDFVoterCounter:
         btn_frame = ttk.Frame(main_frame)
         btn_frame.pack(pady=(0, 10))
 
+        self.batch_mode_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(btn_frame, text="Batch mode (via GCS, $0.01/page, slower to start)",
+                        variable=self.batch_mode_var).pack(pady=(0, 5))
+
         self.process_btn = ttk.Button(btn_frame, text="Process PDF", command=self.process_pdf)
         self.process_btn.pack()
+        ttk.Button(btn_frame, text="Clear Cache", command=self.clear_cache).pack(pady=(5, 0))
 
         # Progress
         progress_frame = ttk.LabelFrame(main_frame, text="Progress", padding="10")
@@ -907,10 +1251,42 @@ class PDFVoterCounter:
         self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         log_scroll.pack(side=tk.RIGHT, fill=tk.Y)
 
+    def run_async(self, coro):
+        """Run a coroutine on the I/O loop and wait for its result (call from a worker thread)."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def shared_session(self):
+        """The keep-alive session shared by all runs, created on the I/O loop on first use."""
+        if self.session is None or self.session.closed:
+            self.session = docai_session()
+        return self.session
+
+    def close_session(self):
+        if self.session is not None and not self.session.closed:
+            asyncio.run_coroutine_threadsafe(self.session.close(), self.loop).result(timeout=5)
+
+    def ui(self, func, *args, **kwargs):
+        """Queue func(*args, **kwargs) to run on the Tk thread (callable from any thread)."""
+        self.ui_queue.put((func, args, kwargs))
+
+    def drain_ui_queue(self):
+        """Apply all queued UI updates in one go, then check again in UI_POLL_MS."""
+        try:
+            while True:
+                func, args, kwargs = self.ui_queue.get_nowait()
+                func(*args, **kwargs)
+        except queue.Empty:
+            pass
+        finally:
+            self.root.after(UI_POLL_MS, self.drain_ui_queue)
+
     def log(self, message):
         self.log_text.insert(tk.END, f"{time.strftime('%H:%M:%S')} - {message}\n")
+        # 'end-1c' is the empty line after the last newline
+        lines = int(self.log_text.index('end-1c').split('.')[0]) - 1
+        if lines > LOG_MAX_LINES:
+            self.log_text.delete('1.0', f'{lines - LOG_MAX_LINES + 1}.0')
         self.log_text.see(tk.END)
-        self.root.update_idletasks()
 
     def check_credentials(self):
         if self.client_id and self.client_secret:
@@ -933,6 +1309,9 @@ class PDFVoterCounter:
                 "GOOGLE_PROJECT_ID=your_project_id\n"
                 "DOCAI_PROCESSOR_ID=your_processor_id\n"
                 "DOCAI_LOCATION=us\n"
+                "\n"
+                "# Batch mode only\n"
+                "GCS_BUCKET=your_bucket\n"
             )
         os.startfile(str(env_file)) if os.name == 'nt' else subprocess.run(['xdg-open', str(env_file)])
 
@@ -953,15 +1332,26 @@ class PDFVoterCounter:
         def do_auth():
             token = self.oauth_manager.get_valid_token()
             if token:
-                self.root.after(0, lambda: self.cred_status_var.set(f"Client ID: {self.client_id[:20]}... (authorized)"))
-                self.root.after(0, lambda: self.log("Authorization successful!"))
+                self.ui(self.cred_status_var.set, f"Client ID: {self.client_id[:20]}... (authorized)")
+                self.ui(self.log, "Authorization successful!")
             else:
-                self.root.after(0, lambda: self.log("Authorization failed"))
+                self.ui(self.log, "Authorization failed")
 
         thread = threading.Thread(target=do_auth)
         thread.daemon = True
         thread.start()
 
+    def clear_cache(self):
+        """Delete the cached Document AI responses."""
+        if not DOCAI_CACHE_DIR.exists():
+            self.log("Cache is already empty")
+            return
+        if not messagebox.askyesno("Clear Cache", "Delete all cached Document AI responses?\n"
+                                   "PDFs processed again will be billed again."):
+            return
+        shutil.rmtree(DOCAI_CACHE_DIR, ignore_errors=True)
+        self.log(f"Cleared cache: {DOCAI_CACHE_DIR}")
+
     def browse_pdf(self):
         pdf_file = filedialog.askopenfilename(
             title="Select PDF File",
@@ -972,31 +1362,43 @@ class PDFVoterCounter:
             self.estimate_cost(pdf_file)
 
     def estimate_cost(self, pdf_path):
-        """Estimate cost based on PDF file."""
+        """Estimate cost from the PDF's page count, which is read in the background."""
         try:
-            # Try to get page count using PyMuPDF or similar
-            # For now, estimate based on file size
-            file_size = Path(pdf_path).stat().st_size
-            estimated_pages = max(1, file_size // 100000)  # ~100KB per page rough estimate
+            stat = Path(pdf_path).stat()
+        except Exception as e:
+            self.file_info_var.set("Error reading file")
+            self.log(f"Error: {e}")
+            return
+
+        self.log(f"Selected: {Path(pdf_path).name}")
+        key = (pdf_path, stat.st_mtime_ns)
+        if key in self.page_counts:
+            self.show_cost_estimate(pdf_path, self.page_counts[key])
+            return
+
+        self.file_info_var.set("Counting pages...")
+        self.cost_estimate_var.set("Est. Cost: --")
 
-            # Try to get actual page count
+        def count_pages():
+            # Opening a large PDF parses its whole xref table, which can take seconds
             try:
-                import fitz  # PyMuPDF
-                doc = fitz.open(pdf_path)
-                estimated_pages = len(doc)
-                doc.close()
-            except:
-                pass
+                with fitz.open(pdf_path) as doc:
+                    pages = len(doc)
+                self.page_counts[key] = pages
+            except Exception:
+                pages = max(1, stat.st_size // 100000)  # ~100KB per page rough estimate
+            self.ui(self.show_cost_estimate, pdf_path, pages)
 
-            cost = estimated_pages * 0.10  # Online processing cost
+        threading.Thread(target=count_pages, daemon=True).start()
 
-            self.file_info_var.set(f"~{estimated_pages} pages")
-            self.cost_estimate_var.set(f"Est. Cost: ${cost:.2f}")
-            self.log(f"Selected: {Path(pdf_path).name}")
-            self.log(f"Estimated pages: ~{estimated_pages}, Cost: ~${cost:.2f}")
-        except Exception as e:
-            self.file_info_var.set("Error reading file")
-            self.log(f"Error: {e}")
+    def show_cost_estimate(self, pdf_path, estimated_pages):
+        if self.pdf_path_var.get() != pdf_path:
+            return  # Another file was picked while this one was being counted
+        cost = estimated_pages * 0.10  # Online processing cost
+
+        self.file_info_var.set(f"~{estimated_pages} pages")
+        self.cost_estimate_var.set(f"Est. Cost: ${cost:.2f}")
+        self.log(f"Estimated pages: ~{estimated_pages}, Cost: ~${cost:.2f}")
 
     def process_pdf(self):
         pdf_path = self.pdf_path_var.get()
@@ -1016,119 +1418,135 @@ class PDFVoterCounter:
             messagebox.showerror("Error", "Please enter Project ID and Processor ID")
             return
 
-        token = self.oauth_manager.get_valid_token()
-        if not token:
-            messagebox.showerror("Error", "Failed to get valid OAuth token")
+        batch_mode = self.batch_mode_var.get()
+        if batch_mode and not self.gcs_bucket:
+            messagebox.showerror("Error", "Batch mode needs GCS_BUCKET in the .env file")
             return
 
         self.process_btn.config(state=tk.DISABLED)
         self.progress.start()
 
-        thread = threading.Thread(target=self.do_process, args=(pdf_path, project_id, processor_id, location))
+        thread = threading.Thread(target=self.do_process, args=(pdf_path, project_id, processor_id, location, batch_mode))
         thread.daemon = True
         thread.start()
 
-    def do_process(self, pdf_path, project_id, processor_id, location):
+    def do_process(self, pdf_path, project_id, processor_id, location, batch_mode=False):
         """Process the PDF file."""
         start_time = time.time()
         pdf_name = Path(pdf_path).stem
 
-        self.root.after(0, lambda: self.status_var.set("Loading PDF..."))
-        self.root.after(0, lambda: self.log(f"Loading PDF: {pdf_name}"))
-
-        try:
-            # Read PDF content
-            with open(pdf_path, 'rb') as f:
-                pdf_content = f.read()
-
-            pdf_b64 = base64.b64encode(pdf_content).decode('utf-8')
-
-            # Check file size (Document AI has 20MB limit for online processing)
-            file_size_mb = len(pdf_content) / (1024 * 1024)
-            self.root.after(0, lambda s=file_size_mb: self.log(f"PDF size: {s:.2f} MB"))
-
-            if file_size_mb > 20:
-                self.root.after(0, lambda: self.log("WARNING: File > 20MB. May need batch processing."))
-
-            self.root.after(0, lambda: self.status_var.set("Processing with Document AI..."))
+        # Checked here rather than on the Tk thread: an expired token means a network
+        # refresh, or even the browser sign-in flow. A valid one is returned from memory.
+        if not self.oauth_manager.get_valid_token():
+            self.ui(self.progress.stop)
+            self.ui(self.process_btn.config, state=tk.NORMAL)
+            self.ui(messagebox.showerror, "Error", "Failed to get valid OAuth token")
+            return
 
-            # Process with Document AI
-            document = process_pdf_with_docai(
-                pdf_b64,
-                self.oauth_manager,
-                project_id,
-                location,
-                processor_id,
-                lambda msg: self.root.after(0, lambda m=msg: self.log(m))
-            )
+        self.ui(self.status_var.set, "Loading PDF...")
+        self.ui(self.log, f"Loading PDF: {pdf_name}")
 
-            if not document:
-                self.root.after(0, lambda: self.status_var.set("Error: No response from API"))
-                self.root.after(0, lambda: self.progress.stop())
-                self.root.after(0, lambda: self.process_btn.config(state=tk.NORMAL))
+        try:
+            log_func = lambda msg: self.ui(self.log, msg)
+
+            if batch_mode:
+                self.ui(self.status_var.set, "Processing with Document AI (batch)...")
+                async def run_batch():
+                    return await batch_process_pdfs(
+                        [pdf_path], self.gcs_bucket, self.oauth_manager, project_id, location, processor_id, log_func,
+                        await self.shared_session()
+                    )
+                documents = self.run_async(run_batch())[pdf_path]
+                self.ui(self.log, "Parsing Document AI response...")
+                # Batch output comes back as several page-range documents
+                part_cards = [parse_document_response(document, pdf_name) for document in documents]
+            else:
+                # Read PDF content
+                with open(pdf_path, 'rb') as f:
+                    pdf_content = f.read()
+
+                file_size_mb = len(pdf_content) / (1024 * 1024)
+                self.ui(self.log, f"PDF size: {file_size_mb:.2f} MB")
+
+                self.ui(self.status_var.set, "Processing with Document AI...")
+
+                # Online requests take at most DOCAI_PAGE_LIMIT pages and DOCAI_SIZE_LIMIT bytes;
+                # larger PDFs go as parts, sent concurrently and parsed as each response arrives
+                async def run_pipeline():
+                    return await docai_pipeline(
+                        pdf_content,
+                        pdf_name,
+                        self.oauth_manager,
+                        project_id,
+                        location,
+                        processor_id,
+                        log_func,
+                        self.parse_pool,
+                        await self.shared_session()
+                    )
+                part_cards = self.run_async(run_pipeline())
+
+            failed = sum(cards is None for cards in part_cards)
+            if failed == len(part_cards):
+                self.ui(self.status_var.set, "Error: No response from API")
+                self.ui(self.progress.stop)
+                self.ui(self.process_btn.config, state=tk.NORMAL)
                 return
+            if failed:
+                self.ui(self.log, f"WARNING: {failed} of {len(part_cards)} parts failed; their cards are missing")
 
-            self.root.after(0, lambda: self.status_var.set("Parsing results..."))
-            self.root.after(0, lambda: self.log("Parsing Document AI response..."))
+            cards = [card for cards_in_part in part_cards if cards_in_part for card in cards_in_part]
 
-            # Parse the response
-            cards = parse_document_response(document, pdf_name)
-
-            self.root.after(0, lambda c=len(cards): self.log(f"Extracted {c} voter cards"))
+            self.ui(self.log, f"Extracted {len(cards)} voter cards")
 
             # Save to Excel
-            self.root.after(0, lambda: self.status_var.set("Saving to Excel..."))
+            self.ui(self.status_var.set, "Saving to Excel...")
 
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Voter Data"
+            # Write-only: rows are streamed to the file instead of kept as cell objects
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet("Voter Data")
 
             headers = ['S.No', 'Part No.', 'Voter S.No', 'Voter ID', 'Name', 'Relation Type',
                        'Relation Name', 'House No', 'Age', 'Gender', 'Source']
 
-            yellow_fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = Font(bold=True)
-                cell.alignment = Alignment(horizontal='center')
+            # Column widths (must be set before any row is written)
+            widths = [8, 12, 10, 15, 25, 12, 25, 15, 8, 10, 40]
+            for col, width in enumerate(widths, 1):
+                ws.column_dimensions[get_column_letter(col)].width = width
+
+            header_cells = []
+            for header in headers:
+                cell = WriteOnlyCell(ws, value=header)
+                cell.font = HEADER_FONT
+                cell.alignment = HEADER_ALIGNMENT
+                header_cells.append(cell)
+            ws.append(header_cells)
+
+            def highlighted_if_missing(value, field):
+                """The value, or a yellow cell when it's empty (counted in missing_stats)."""
+                if value:
+                    return value
+                missing_stats[field] += 1
+                cell = WriteOnlyCell(ws, value=value)
+                cell.fill = MISSING_FILL
+                return cell
 
             missing_stats = {'name': 0, 'age': 0, 'gender': 0}
 
-            for row_num, card in enumerate(cards, 2):
-                ws.cell(row=row_num, column=1, value=row_num - 1)
-                ws.cell(row=row_num, column=2, value=card.get('part_no', ''))
-                ws.cell(row=row_num, column=3, value=card.get('serial_no', ''))
-                ws.cell(row=row_num, column=4, value=card.get('voter_id', ''))
-
-                name_val = card.get('name', '')
-                name_cell = ws.cell(row=row_num, column=5, value=name_val)
-                if not name_val:
-                    name_cell.fill = yellow_fill
-                    missing_stats['name'] += 1
-
-                ws.cell(row=row_num, column=6, value=card.get('relation_type', ''))
-                ws.cell(row=row_num, column=7, value=card.get('relation_name', ''))
-                ws.cell(row=row_num, column=8, value=card.get('house_no', ''))
-
-                age_val = card.get('age', '')
-                age_cell = ws.cell(row=row_num, column=9, value=age_val)
-                if not age_val:
-                    age_cell.fill = yellow_fill
-                    missing_stats['age'] += 1
-
-                gender_val = card.get('gender', '')
-                gender_cell = ws.cell(row=row_num, column=10, value=gender_val)
-                if not gender_val:
-                    gender_cell.fill = yellow_fill
-                    missing_stats['gender'] += 1
-
-                ws.cell(row=row_num, column=11, value=card.get('folder_name', ''))
-
-            # Column widths
-            widths = [8, 12, 10, 15, 25, 12, 25, 15, 8, 10, 40]
-            for col, width in enumerate(widths, 1):
-                ws.column_dimensions[chr(64 + col)].width = width
+            for row_num, card in enumerate(cards, 1):
+                ws.append([
+                    row_num,
+                    card.get('part_no', ''),
+                    card.get('serial_no', ''),
+                    card.get('voter_id', ''),
+                    highlighted_if_missing(card.get('name', ''), 'name'),
+                    card.get('relation_type', ''),
+                    card.get('relation_name', ''),
+                    card.get('house_no', ''),
+                    highlighted_if_missing(card.get('age', ''), 'age'),
+                    highlighted_if_missing(card.get('gender', ''), 'gender'),
+                    card.get('folder_name', ''),
+                ])
 
             excel_path = Path(pdf_path).parent / f"{pdf_name}_docai_excel.xlsx"
             wb.save(excel_path)
@@ -1136,31 +1554,31 @@ class PDFVoterCounter:
             elapsed = time.time() - start_time
             elapsed_str = f"{int(elapsed//60)}m {int(elapsed%60)}s"
 
-            self.root.after(0, lambda: self.progress.stop())
-            self.root.after(0, lambda: self.status_var.set("Complete!"))
-            self.root.after(0, lambda c=len(cards): self.cards_var.set(f"{c:,}"))
-            self.root.after(0, lambda e=elapsed_str: self.time_var.set(e))
-            self.root.after(0, lambda: self.process_btn.config(state=tk.NORMAL))
+            self.ui(self.progress.stop)
+            self.ui(self.status_var.set, "Complete!")
+            self.ui(self.cards_var.set, f"{len(cards):,}")
+            self.ui(self.time_var.set, elapsed_str)
+            self.ui(self.process_btn.config, state=tk.NORMAL)
 
-            self.root.after(0, lambda p=str(excel_path): self.log(f"Saved: {p}"))
-            self.root.after(0, lambda: self.log(f"Missing - Name: {missing_stats['name']}, Age: {missing_stats['age']}, Gender: {missing_stats['gender']}"))
+            self.ui(self.log, f"Saved: {excel_path}")
+            self.ui(self.log, f"Missing - Name: {missing_stats['name']}, Age: {missing_stats['age']}, Gender: {missing_stats['gender']}")
 
-            self.root.after(0, lambda: messagebox.showinfo("Complete",
+            self.ui(messagebox.showinfo, "Complete",
                 f"Processing complete!\n\n"
                 f"Cards: {len(cards):,}\n"
                 f"Time: {elapsed_str}\n\n"
                 f"Missing Name: {missing_stats['name']}\n"
                 f"Missing Age: {missing_stats['age']}\n"
                 f"Missing Gender: {missing_stats['gender']}\n\n"
-                f"Excel: {excel_path.name}"))
+                f"Excel: {excel_path.name}")
 
         except Exception as e:
-            self.root.after(0, lambda: self.progress.stop())
-            self.root.after(0, lambda err=str(e): self.status_var.set(f"Error: {err}"))
-            self.root.after(0, lambda err=str(e): self.log(f"ERROR: {err}"))
-            self.root.after(0, lambda: self.process_btn.config(state=tk.NORMAL))
+            self.ui(self.progress.stop)
+            self.ui(self.status_var.set, f"Error: {e}")
+            self.ui(self.log, f"ERROR: {e}")
+            self.ui(self.process_btn.config, state=tk.NORMAL)
             import traceback
-            self.root.after(0, lambda: self.log(traceback.format_exc()))
+            self.ui(self.log, traceback.format_exc())
 
 
 def main():
@@ -1,29 +1,86 @@
 """
 Reprocess voter cards with updated parsing logic - Full extraction
 """
+import os
 import re
-import io
 import shutil
 from pathlib import Path
+
+# Tesseract's own OpenMP threads slow it down; parallelism comes from running several
+# (set before tesserocr loads libtesseract; pool workers inherit it)
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+import numpy as np
 from PIL import Image
 import pytesseract
 import fitz
+try:
+    from tesserocr import PyTessBaseAPI
+except ImportError:
+    PyTessBaseAPI = None  # Falls back to running the tesseract executable per card
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment
+from openpyxl.utils import get_column_letter
 import sys
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import multiprocessing
+
+WORKERS = multiprocessing.cpu_count()
+
+# Compiled once; parse_voter_card runs for every card in the constituency
+PHOTO_RE = re.compile(r'\s*Photo\s*is\s*', re.IGNORECASE)
+AVAILABLE_RE = re.compile(r'\s*available\s*', re.IGNORECASE)
+EDGE_PUNCT_RE = re.compile(r'^[\s\-–.,:]+|[\s\-–.,:]+$')
+SPACES_RE = re.compile(r'\s+')
+VOTER_ID_RES = [
+    re.compile(r'\b([A-Z]{2,3}\d{6,10})\b'),
+    re.compile(r'\b([A-Z0-9]{2,3}\d{6,10})\b'),
+]
+SERIAL_ONLY_RE = re.compile(r'^(\d{1,4})\s*$')
+SERIAL_PREFIX_RE = re.compile(r'^(\d{1,4})\s+\S')
+AGE_RE = re.compile(r'வயது\s*:\s*(\d+)')
+
+RENDER_MATRIX = fitz.Matrix(2, 2)  # Pages are rendered at zoom 2 for OCR
+# Checkpoint page renders as raw .npy instead of PNG: ~15x faster to write and read back,
+# but ~15x the disk (about 6 MB a page) until the temp folder is removed
+RAW_PAGE_CACHE = False
+# Taller cards are scaled down before OCR: tesseract's time grows with pixel count, and text
+# lines past ~30 px high read no better. At zoom 2 an A4 card row is ~160 px, under this.
+OCR_MAX_CARD_HEIGHT = 200
+
+# Excel header style, shared by every header cell
+HEADER_FONT = Font(bold=True)
+HEADER_ALIGNMENT = Alignment(horizontal='center')
+
+
+@dataclass(slots=True)
+class VoterCard:
+    """Parsed fields of one card. Slots keep a constituency's worth of cards far smaller than dicts."""
+    serial_no: str = ''
+    voter_id: str = ''
+    name: str = ''
+    relation_name: str = ''
+    relation_type: str = ''
+    house_no: str = ''
+    age: str = ''
+    gender: str = ''
+
 
 def clean_ocr_text(text):
     if not text:
         return ''
-    text = re.sub(r'\s*Photo\s*is\s*', ' ', text, flags=re.IGNORECASE)
-    text = re.sub(r'\s*available\s*', ' ', text, flags=re.IGNORECASE)
-    text = re.sub(r'^[\s\-–.,:]+|[\s\-–.,:]+$', '', text)
-    text = re.sub(r'\s+', ' ', text)
+    text = PHOTO_RE.sub(' ', text)
+    text = AVAILABLE_RE.sub(' ', text)
+    text = EDGE_PUNCT_RE.sub('', text)
+    text = SPACES_RE.sub(' ', text)
     return text.strip()
 
 
 def parse_voter_card(text):
-    """Parse OCR text from voter card - UPDATED with all relation types."""
+    """Parse OCR text from voter card into a VoterCard - UPDATED with all relation types."""
     data = {
         'serial_no': '',
         'voter_id': '',
@@ -38,13 +95,8 @@ def parse_voter_card(text):
     full_text = text
 
     # Extract Voter ID
-    voter_id_patterns = [
-        r'\b([A-Z]{2,3}\d{6,10})\b',
-        r'\b([A-Z0-9]{2,3}\d{6,10})\b',
-    ]
-
-    for pattern in voter_id_patterns:
-        matches = re.findall(pattern, full_text)
+    for pattern in VOTER_ID_RES:
+        matches = pattern.findall(full_text)
         for match in matches:
             if len(match) >= 9:
                 data['voter_id'] = match
@@ -61,68 +113,62 @@ def parse_voter_card(text):
 
         # Extract serial number
         if not data['serial_no']:
-            serial_match = re.match(r'^(\d{1,4})\s*$', line)
+            serial_match = SERIAL_ONLY_RE.match(line)
             if serial_match:
                 data['serial_no'] = serial_match.group(1)
             else:
-                serial_match = re.match(r'^(\d{1,4})\s+\S', line)
+                serial_match = SERIAL_PREFIX_RE.match(line)
                 if serial_match:
                     num = serial_match.group(1)
                     if int(num) < 2000:
                         data['serial_no'] = num
 
-        # Extract name
-        if 'பெயர்' in line and ':' in line:
-            if 'தந்தை' not in line and 'கணவர்' not in line and 'தாய்' not in line and 'இதரர்' not in line:
-                name_part = line.split(':', 1)[-1]
-                name_part = clean_ocr_text(name_part)
-                if name_part and not data['name']:
-                    data['name'] = name_part
-
-        # Extract father's name (handles both தந்தை பெயர் and தந்தையின் பெயர்)
-        if ('தந்தை' in line or 'தந்தையின்' in line) and 'பெயர்' in line and ':' in line:
-            rel_part = line.split(':', 1)[-1]
-            rel_part = clean_ocr_text(rel_part)
-            if rel_part and not data['relation_name']:
-                data['relation_name'] = rel_part
-                data['relation_type'] = 'Father'
-
-        # Extract husband's name (handles both கணவர் பெயர் and கணவரின் பெயர்)
-        if ('கணவர்' in line or 'கணவரின்' in line) and ':' in line:
-            rel_part = line.split(':', 1)[-1]
-            rel_part = clean_ocr_text(rel_part)
-            if rel_part and not data['relation_name']:
-                data['relation_name'] = rel_part
-                data['relation_type'] = 'Husband'
-
-        # Extract mother's name (handles both தாய் பெயர் and தாயின் பெயர்)
-        if ('தாய்' in line or 'தாயின்' in line) and 'பெயர்' in line and ':' in line:
-            rel_part = line.split(':', 1)[-1]
-            rel_part = clean_ocr_text(rel_part)
-            if rel_part and not data['relation_name']:
-                data['relation_name'] = rel_part
-                data['relation_type'] = 'Mother'
-
-        # Extract other's name (இதரர் பெயர் / இதரரின் பெயர்)
-        if ('இதரர்' in line or 'இதரரின்' in line) and 'பெயர்' in line and ':' in line:
-            rel_part = line.split(':', 1)[-1]
-            rel_part = clean_ocr_text(rel_part)
-            if rel_part and not data['relation_name']:
-                data['relation_name'] = rel_part
-                data['relation_type'] = 'Other'
-
-        # Extract house number
-        if ('வீட்டு' in line or 'ட்டு' in line) and 'எண்' in line and ':' in line:
-            house_part = line.split(':', 1)[-1]
-            house_part = clean_ocr_text(house_part)
-            if house_part and not data['house_no']:
-                data['house_no'] = house_part
-
-        # Extract age
-        if 'வயது' in line and ':' in line:
-            age_match = re.search(r'வயது\s*:\s*(\d+)', line)
-            if age_match:
-                data['age'] = age_match.group(1)
+        # Every field but gender is written as "label : value"
+        if ':' in line:
+            has_name_label = 'பெயர்' in line
+            has_father = 'தந்தை' in line  # Also matches தந்தையின்
+            has_husband = 'கணவர்' in line
+            has_mother = 'தாய்' in line
+            has_other = 'இதரர்' in line
+
+            # Which empty fields this line can fill; the value is cleaned once for all of them
+            fields = []
+            if has_name_label and not (has_father or has_husband or has_mother or has_other):
+                if not data['name']:
+                    fields.append('name')
+
+            # Relation: first found wins - father, husband, mother, other
+            # (handles both தந்தை பெயர் and தந்தையின் பெயர், கணவர் and கணவரின், etc.)
+            if not data['relation_name']:
+                relation_type = ''
+                if has_father and has_name_label:
+                    relation_type = 'Father'
+                elif has_husband or 'கணவரின்' in line:
+                    relation_type = 'Husband'
+                elif (has_mother or 'தாயின்' in line) and has_name_label:
+                    relation_type = 'Mother'
+                elif (has_other or 'இதரரின்' in line) and has_name_label:
+                    relation_type = 'Other'
+                if relation_type:
+                    fields.append('relation_name')
+
+            # House number (ட்டு also catches வீட்டு with a misread first letter)
+            if 'ட்டு' in line and 'எண்' in line and not data['house_no']:
+                fields.append('house_no')
+
+            if fields:
+                value = clean_ocr_text(line.split(':', 1)[-1])
+                if value:
+                    for field in fields:
+                        data[field] = value
+                    if 'relation_name' in fields:
+                        data['relation_type'] = relation_type
+
+            # Extract age
+            if 'வயது' in line:
+                age_match = AGE_RE.search(line)
+                if age_match:
+                    data['age'] = age_match.group(1)
 
         # Extract gender
         if 'பாலினம்' in line:
@@ -131,112 +177,184 @@ def parse_voter_card(text):
             elif 'பெண்' in line:
                 data['gender'] = 'Female'
 
-    return data
+    return VoterCard(**data)
 
-
-def extract_and_ocr_pdf(pdf_path, temp_dir):
-    """Extract cards from PDF and OCR them."""
+
+TESS_API = None  # This process's tesserocr engine, created on first use
+
+
+def ocr_card(card_arr):
+    """OCR a card, given as an RGB array (usually a view into the page array).
+
+    With tesserocr the models stay loaded between cards instead of being reloaded by a
+    new tesseract process each time, and the pixels are handed over without a PIL image.
+    """
+    global TESS_API
+    if PyTessBaseAPI is None:
+        return pytesseract.image_to_string(Image.fromarray(card_arr), lang='tam+eng')
+    if TESS_API is None:
+        TESS_API = PyTessBaseAPI(lang='tam+eng')
+    height, width = card_arr.shape[:2]
+    TESS_API.SetImageBytes(card_arr.tobytes(), width, height, 3, width * 3)
+    return TESS_API.GetUTF8Text()
+
+
+def save_atomically(path, write):
+    """Call write(tmp_path), then move the result to path, so an interrupted write leaves no partial file."""
+    tmp_path = path.with_name(path.name + '.tmp')
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def shrink_card(card_arr, max_height=OCR_MAX_CARD_HEIGHT):
+    """The card scaled down (keeping its aspect ratio) to at most max_height pixels high."""
+    card_img = Image.fromarray(card_arr)
+    card_img.thumbnail((card_img.width, max_height), Image.LANCZOS)
+    return np.asarray(card_img)
+
+
+def save_array(path, arr):
+    with open(path, 'wb') as f:  # np.save(path) would append .npy to the .tmp name
+        np.save(f, arr)
+
+
+def ocr_page(pdf_path, page_num, cache_dir):
+    """Render one page, OCR its card slots and return their parsed data (None where OCR failed).
+
+    The render and each card's OCR text are kept in cache_dir, so a rerun after a crash
+    only redoes the pages and cards that never finished.
+    """
+    cache_dir = Path(cache_dir)
+    page_path = cache_dir / (f'page_{page_num}.npy' if RAW_PAGE_CACHE else f'page_{page_num}.png')
+    if page_path.exists():
+        page_arr = np.load(page_path) if RAW_PAGE_CACHE else np.asarray(Image.open(page_path))
+    else:
+        with fitz.open(pdf_path) as doc:
+            pix = doc[page_num].get_pixmap(matrix=RENDER_MATRIX, alpha=False)
+        # Straight from the pixmap's RGB samples, not decoded back from the saved file
+        page_arr = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+        if RAW_PAGE_CACHE:
+            save_atomically(page_path, lambda tmp: save_array(tmp, page_arr))
+        else:
+            save_atomically(page_path, lambda tmp: pix.save(str(tmp), output='png'))
+
+    page_height, page_width = page_arr.shape[:2]
+
+    num_cols = 3
+    num_rows = 10
+
+    header_height = int(page_height * 0.035)
+    footer_height = int(page_height * 0.025)
+    content_height = page_height - header_height - footer_height
+
+    card_width = page_width // num_cols
+    row_height = content_height // num_rows
+
+    cards = []
+    for row in range(num_rows):
+        for col in range(num_cols):
+            x1 = col * card_width
+            y1 = header_height + row * row_height
+            x2 = x1 + card_width
+            y2 = y1 + row_height
+
+            padding = 1
+            x1 = max(0, x1 + padding)
+            y1 = max(0, y1 + padding)
+            x2 = min(page_width, x2 - padding)
+            y2 = min(page_height, y2 - padding)
+
+            # A view into the page, not a copy; blank slots are skipped
+            card_arr = page_arr[y1:y2, x1:x2, :3]
+            if card_arr.mean() > 252:
+                continue
+
+            # OCR text is cached rather than parsed data, so parser changes still apply on a rerun
+            text_path = cache_dir / f'card_{page_num}_{row}_{col}.txt'
+            if text_path.exists():
+                cards.append(parse_voter_card(text_path.read_text(encoding='utf-8')))
+                continue
+
+            if card_arr.shape[0] > OCR_MAX_CARD_HEIGHT:
+                card_arr = shrink_card(card_arr)
+
+            # OCR the card directly
+            try:
+                text = ocr_card(card_arr)
+                save_atomically(text_path, lambda tmp: tmp.write_text(text, encoding='utf-8'))
+                cards.append(parse_voter_card(text))
+            except Exception as e:
+                print(f"OCR error: {e}")
+                cards.append(None)
+
+    return cards
+
+
+def extract_and_ocr_pdf(pdf_path, temp_dir, executor=None):
+    """Extract cards from PDF and OCR them, one page per worker process."""
     pdf_path = Path(pdf_path)
     pdf_name = pdf_path.stem
     output_path = temp_dir / pdf_name
     output_path.mkdir(parents=True, exist_ok=True)
 
-    results = []
-
-    doc = fitz.open(str(pdf_path))
-    num_pages = len(doc)
+    with fitz.open(str(pdf_path)) as doc:
+        num_pages = len(doc)
 
     start_page = 3
     end_page = num_pages - 1
-    card_count = 0
-
-    for page_num in range(start_page, end_page):
-        page = doc[page_num]
-
-        zoom = 2
-        mat = fitz.Matrix(zoom, zoom)
-        pix = page.get_pixmap(matrix=mat)
-        img_data = pix.tobytes("png")
-        page_img = Image.open(io.BytesIO(img_data))
-
-        page_width, page_height = page_img.size
-
-        num_cols = 3
-        num_rows = 10
-
-        header_height = int(page_height * 0.035)
-        footer_height = int(page_height * 0.025)
-        content_height = page_height - header_height - footer_height
-
-        card_width = page_width // num_cols
-        row_height = content_height // num_rows
-
-        for row in range(num_rows):
-            for col in range(num_cols):
-                x1 = col * card_width
-                y1 = header_height + row * row_height
-                x2 = x1 + card_width
-                y2 = y1 + row_height
-
-                padding = 1
-                x1 = max(0, x1 + padding)
-                y1 = max(0, y1 + padding)
-                x2 = min(page_width, x2 - padding)
-                y2 = min(page_height, y2 - padding)
-
-                card_img = page_img.crop((x1, y1, x2, y2))
-
-                card_array = list(card_img.getdata())
-                if card_array:
-                    avg_brightness = sum(sum(p[:3]) / 3 for p in card_array) / len(card_array)
-                    if avg_brightness > 252:
-                        continue
-
-                card_count += 1
-
-                # OCR the card directly
-                try:
-                    text = pytesseract.image_to_string(card_img, lang='tam+eng')
-                    data = parse_voter_card(text)
-                    results.append((str(card_count), data, pdf_name))
-                except Exception as e:
-                    print(f"OCR error: {e}")
-                    results.append((str(card_count), None, pdf_name))
-
-    doc.close()
+    page_nums = range(start_page, end_page)
+
+    task_args = (repeat(str(pdf_path)), page_nums, repeat(str(output_path)))
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=WORKERS) as executor:
+            page_cards = list(executor.map(ocr_page, *task_args))
+    else:
+        page_cards = list(executor.map(ocr_page, *task_args))
+
+    # Numbered in page order, whichever page finished first
+    results = []
+    for cards in page_cards:
+        for data in cards:
+            results.append((str(len(results) + 1), data, pdf_name))
     return results
 
 
 def create_excel(results, output_path, constituency_name):
     """Create Excel file from results."""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Voter Data"
+    # Write-only: rows are streamed to the file instead of kept as cell objects
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Voter Data")
+
+    # Column widths (must be set before any row is written)
+    column_widths = [8, 15, 25, 12, 25, 15, 8, 10, 30]
+    for col, width in enumerate(column_widths, 1):
+        ws.column_dimensions[get_column_letter(col)].width = width
 
     headers = ['S.No', 'Voter ID', 'Name', 'Relation Type', 'Relation Name',
                'House No', 'Age', 'Gender', 'Constituency']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = HEADER_FONT
+        cell.alignment = HEADER_ALIGNMENT
+        header_cells.append(cell)
+    ws.append(header_cells)
 
-    row_num = 2
     for s_no, data, pdf_name in results:
-        ws.cell(row=row_num, column=1, value=s_no)
         if data:
-            ws.cell(row=row_num, column=2, value=data.get('voter_id', ''))
-            ws.cell(row=row_num, column=3, value=data.get('name', ''))
-            ws.cell(row=row_num, column=4, value=data.get('relation_type', ''))
-            ws.cell(row=row_num, column=5, value=data.get('relation_name', ''))
-            ws.cell(row=row_num, column=6, value=data.get('house_no', ''))
-            ws.cell(row=row_num, column=7, value=data.get('age', ''))
-            ws.cell(row=row_num, column=8, value=data.get('gender', ''))
-        ws.cell(row=row_num, column=9, value=constituency_name)
-        row_num += 1
-
-    column_widths = [8, 15, 25, 12, 25, 15, 8, 10, 30]
-    for col, width in enumerate(column_widths, 1):
-        ws.column_dimensions[chr(64 + col)].width = width
+            ws.append([
+                s_no,
+                data.voter_id,
+                data.name,
+                data.relation_type,
+                data.relation_name,
+                data.house_no,
+                data.age,
+                data.gender,
+                constituency_name,
+            ])
+        else:
+            ws.append([s_no, None, None, None, None, None, None, None, constituency_name])
 
     wb.save(output_path)
     print(f"Excel saved: {output_path}")
@@ -258,11 +376,12 @@ if __name__ == "__main__":
     temp_dir.mkdir(exist_ok=True)
 
     all_results = []
-    for i, pdf_path in enumerate(pdf_files):
-        print(f"Processing PDF {i+1}/{len(pdf_files)}: {pdf_path.name}...")
-        results = extract_and_ocr_pdf(pdf_path, temp_dir)
-        all_results.extend(results)
-        print(f"  Extracted {len(results)} cards")
+    with ProcessPoolExecutor(max_workers=WORKERS) as executor:
+        for i, pdf_path in enumerate(pdf_files):
+            print(f"Processing PDF {i+1}/{len(pdf_files)}: {pdf_path.name}...")
+            results = extract_and_ocr_pdf(pdf_path, temp_dir, executor)
+            all_results.extend(results)
+            print(f"  Extracted {len(results)} cards")
 
     output_path = Path(f"{constituency}_excel.xlsx")
     create_excel(all_results, output_path, constituency)
@@ -270,8 +389,8 @@ if __name__ == "__main__":
     # Count relation types
     relation_counts = {}
     for _, data, _ in all_results:
-        if data and data.get('relation_type'):
-            rt = data['relation_type']
+        if data and data.relation_type:
+            rt = data.relation_type
             relation_counts[rt] = relation_counts.get(rt, 0) + 1
 
     print(f"\nTotal cards: {len(all_results)}")
@@ -5,6 +5,7 @@
 #     "pdf2image",
 #     "pytesseract",
 #     "pillow",
+#     "orjson",
 # ]
 # ///
 """
@@ -23,26 +24,45 @@ Prerequisites:
 """
 
 import argparse
-import json
 import os
+import re
+import sqlite3
 import sys
 from datetime import datetime
 from pathlib import Path
 from concurrent.futures import ProcessPoolExecutor, as_completed
 import multiprocessing
 
+import orjson
+
 # ============== CONFIGURATION ==============
 # SEARCH_NAME = "வினாயக்"
 SEARCH_NAME = "விநாயக்"
 
 PDF_FOLDER = "118-eroll"
-EXTRACTED_DATA_FILE = "extracted_data.json"
+EXTRACTED_DATA_FILE = "extracted_data.db"  # SQLite, page text indexed with FTS5 for search
 RESULTS_FILE = "results.txt"
 DPI = 150
 WORKERS = multiprocessing.cpu_count()
 SKIP_PAGES = [1, 2]  # Header pages
 # ===========================================
 
+# Voter details read from the lines around a match
+AGE_RE = re.compile(r'வயது\s*[:\-]?\s*(\d{2,3})')
+FATHER_RE = re.compile(r'தந்தை(?:யின்)?\s*(?:பெயர்)?\s*[:\-]?\s*([^\n\-]+)')
+HUSBAND_RE = re.compile(r'கணவர்\s*(?:பெயர்)?\s*[:\-]?\s*([^\n\-]+)')
+
+# pages holds the OCR text; pages_fts indexes the same rows' normalize_tamil() text in
+# trigrams, so any substring of 3+ characters is found without scanning every page
+SCHEMA = """
+DROP TABLE IF EXISTS meta;
+DROP TABLE IF EXISTS pages;
+DROP TABLE IF EXISTS pages_fts;
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE pages (id INTEGER PRIMARY KEY, pdf TEXT NOT NULL, page INTEGER NOT NULL, text TEXT NOT NULL);
+CREATE VIRTUAL TABLE pages_fts USING fts5(text, content='', tokenize='trigram case_sensitive 1');
+"""
+
 
 def normalize_tamil(text: str) -> str:
     """Remove Tamil vowel signs for fuzzy matching."""
@@ -95,8 +115,48 @@ def extract_single_pdf(args) -> dict:
     return result
 
 
+def create_database(db_file: str) -> sqlite3.Connection:
+    """Open db_file with empty tables (replacing any earlier extraction)."""
+    db = sqlite3.connect(db_file)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.executescript(SCHEMA)
+    return db
+
+
+def add_pdf_pages(db: sqlite3.Connection, pdf_name: str, pages: list):
+    """Store one PDF's pages. One transaction per PDF: finished PDFs are on disk even if the run stops."""
+    with db:
+        for page_data in pages:
+            cursor = db.execute(
+                'INSERT INTO pages (pdf, page, text) VALUES (?, ?, ?)',
+                (pdf_name, page_data['page'], page_data['text'])
+            )
+            db.execute(
+                'INSERT INTO pages_fts (rowid, text) VALUES (?, ?)',
+                (cursor.lastrowid, normalize_tamil(page_data['text']))
+            )
+
+
+def import_json_data(json_file: str, db_file: str):
+    """Build the database from an extracted_data.json written by earlier versions of this tool."""
+    print(f"\nImporting {json_file} into {db_file} (one-time)...")
+    with open(json_file, 'rb') as f:
+        extracted = orjson.loads(f.read())
+
+    db = create_database(db_file)
+    for pdf_data in extracted['data']:
+        add_pdf_pages(db, pdf_data['pdf'], pdf_data['pages'])
+    with db:
+        db.executemany('INSERT INTO meta (key, value) VALUES (?, ?)', [
+            ('extracted_at', extracted.get('extracted_at', '')),
+            ('total_pdfs', str(extracted.get('total_pdfs', len(extracted['data'])))),
+        ])
+    db.close()
+
+
 def extract_all_pdfs(folder_path: str, output_file: str, workers: int):
-    """Extract text from all PDFs and save to JSON."""
+    """Extract text from all PDFs and save to the SQLite database."""
     pdf_files = sorted(Path(folder_path).glob("*.pdf"))
     total = len(pdf_files)
 
@@ -110,7 +170,9 @@ def extract_all_pdfs(folder_path: str, output_file: str, workers: int):
     print(f"{'='*60}\n")
 
     task_args = [(str(pdf), i+1, total) for i, pdf in enumerate(pdf_files)]
-    all_data = []
+    pdfs_with_data = 0
+
+    db = create_database(output_file)
 
     with ProcessPoolExecutor(max_workers=workers) as executor:
         futures = {executor.submit(extract_single_pdf, args): args for args in task_args}
@@ -119,23 +181,23 @@ def extract_all_pdfs(folder_path: str, output_file: str, workers: int):
             try:
                 result = future.result()
                 if result['pages']:
-                    all_data.append(result)
+                    add_pdf_pages(db, result['pdf'], result['pages'])
+                    pdfs_with_data += 1
             except Exception as e:
                 print(f"Error: {e}")
 
-    # Save to JSON
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            'extracted_at': datetime.now().isoformat(),
-            'total_pdfs': total,
-            'data': all_data
-        }, f, ensure_ascii=False, indent=2)
+    with db:
+        db.executemany('INSERT INTO meta (key, value) VALUES (?, ?)', [
+            ('extracted_at', datetime.now().isoformat()),
+            ('total_pdfs', str(total)),
+        ])
+    db.close()
 
     print(f"\n{'='*60}")
     print(f"EXTRACTION COMPLETE!")
     print(f"{'='*60}")
     print(f"PDFs processed: {total}")
-    print(f"PDFs with data: {len(all_data)}")
+    print(f"PDFs with data: {pdfs_with_data}")
     print(f"Saved to: {output_file}")
     print(f"\nNow run: uv run search_election_roll.py search")
 
@@ -146,13 +208,17 @@ def search_extracted_data(data_file: str, search_name: str, results_file: str):
     """Search pre-extracted data (instant!)."""
 
     if not os.path.exists(data_file):
-        print(f"Error: {data_file} not found!")
-        print(f"First run: uv run search_election_roll.py extract")
-        sys.exit(1)
+        # Text extracted before the switch to SQLite is imported rather than extracted again
+        json_file = str(Path(data_file).with_suffix('.json'))
+        if os.path.exists(json_file):
+            import_json_data(json_file, data_file)
+        else:
+            print(f"Error: {data_file} not found!")
+            print(f"First run: uv run search_election_roll.py extract")
+            sys.exit(1)
 
-    print(f"\nLoading extracted data from {data_file}...")
-    with open(data_file, 'r', encoding='utf-8') as f:
-        extracted = json.load(f)
+    print(f"\nOpening extracted data: {data_file}")
+    db = sqlite3.connect(data_file)
 
     print(f"Searching for: {search_name}")
     print(f"{'='*60}")
@@ -160,27 +226,35 @@ def search_extracted_data(data_file: str, search_name: str, results_file: str):
     normalized_search = normalize_tamil(search_name)
     results = []
 
-    for pdf_data in extracted['data']:
-        pdf_name = pdf_data['pdf']
-        for page_data in pdf_data['pages']:
-            page_num = page_data['page']
-            text = page_data['text']
-
-            # Fuzzy search
-            if normalized_search in normalize_tamil(text):
-                lines = text.split('\n')
-                for line_num, line in enumerate(lines):
-                    if normalized_search in normalize_tamil(line):
-                        start = max(0, line_num - 3)
-                        end = min(len(lines), line_num + 6)
-                        context = '\n'.join(lines[start:end])
-
-                        results.append({
-                            'pdf': pdf_name,
-                            'page': page_num,
-                            'line': line.strip(),
-                            'context': context
-                        })
+    if len(normalized_search) >= 3:
+        # Only pages whose normalized text contains the name, via the trigram index
+        rows = db.execute(
+            'SELECT pdf, page, text FROM pages WHERE id IN '
+            '(SELECT rowid FROM pages_fts WHERE pages_fts MATCH ?) ORDER BY id',
+            ('"' + normalized_search.replace('"', '""') + '"',)
+        )
+    else:
+        # Trigrams can't match fewer than 3 characters: check every page
+        rows = db.execute('SELECT pdf, page, text FROM pages ORDER BY id')
+
+    for pdf_name, page_num, text in rows:
+        # Fuzzy search
+        if normalized_search in normalize_tamil(text):
+            lines = text.split('\n')
+            for line_num, line in enumerate(lines):
+                if normalized_search in normalize_tamil(line):
+                    start = max(0, line_num - 3)
+                    end = min(len(lines), line_num + 6)
+                    context = '\n'.join(lines[start:end])
+
+                    results.append({
+                        'pdf': pdf_name,
+                        'page': page_num,
+                        'line': line.strip(),
+                        'context': context,
+                        'details': extract_voter_details(context),  # Shared by print and save
+                    })
+    db.close()
 
     # Print results
     print_results(results, search_name)
@@ -193,11 +267,10 @@ def search_extracted_data(data_file: str, search_name: str, results_file: str):
 
 def extract_voter_details(context: str) -> dict:
     """Extract voter details from context."""
-    import re
     details = {'age': None, 'father_name': None, 'gender': None}
 
     # Age
-    age_match = re.search(r'வயது\s*[:\-]?\s*(\d{2,3})', context)
+    age_match = AGE_RE.search(context)
     if age_match:
         details['age'] = age_match.group(1)
 
@@ -208,12 +281,12 @@ def extract_voter_details(context: str) -> dict:
         details['gender'] = 'பெண் (Female)'
 
     # Father's name
-    father_match = re.search(r'தந்தை(?:யின்)?\s*(?:பெயர்)?\s*[:\-]?\s*([^\n\-]+)', context)
+    father_match = FATHER_RE.search(context)
     if father_match:
         details['father_name'] = father_match.group(1).strip()[:40]
 
     # Husband's name
-    husband_match = re.search(r'கணவர்\s*(?:பெயர்)?\s*[:\-]?\s*([^\n\-]+)', context)
+    husband_match = HUSBAND_RE.search(context)
     if husband_match:
         details['father_name'] = f"(கணவர்) {husband_match.group(1).strip()[:40]}"
 
@@ -239,7 +312,7 @@ def print_results(results: list, search_name: str):
         print(f"PDF: {result['pdf']}")
         print(f"Page: {result['page']}")
 
-        details = extract_voter_details(result['context'])
+        details = result['details']
         if details['age']:
             print(f"Age: {details['age']}")
         if details['gender']:
@@ -275,7 +348,7 @@ def save_results(results: list, search_name: str, output_file: str):
                 f.write(f"PDF: {result['pdf']}\n")
                 f.write(f"Page: {result['page']}\n")
 
-                details = extract_voter_details(result['context'])
+                details = result['details']
                 if details['age']:
                     f.write(f"Age: {details['age']}\n")
                 if details['gender']:
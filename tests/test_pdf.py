@@ -0,0 +1,22 @@
+import fitz
+
+import pdf
+
+
+def make_pdf(page_count):
+    with fitz.open() as doc:
+        for i in range(page_count):
+            doc.new_page().insert_text((72, 72), f"Page {i + 1}")
+        return doc.tobytes()
+
+
+def test_split_pdf_cache_paths_are_stable():
+    pdf_content = make_pdf(pdf.DOCAI_PAGE_LIMIT * 2 + 1)
+
+    first = pdf.split_pdf(pdf_content)
+    second = pdf.split_pdf(pdf_content)
+
+    assert len(first) == 3
+    assert first == second
+    assert ([pdf.docai_cache_path(part, 'project', 'us', 'processor', '') for part in first] ==
+            [pdf.docai_cache_path(part, 'project', 'us', 'processor', '') for part in second])